@@ -2,43 +2,328 @@
 import os
 import pandas as pd
 import numpy as np
+from core.ca.ca_population import AgentPopulation, NO_FAMILY
+
+# Log column name -> dtype
+LOG_COLUMNS = {
+    'timestep': np.int32,
+    'agent_id': np.int32,
+    'x': np.int32,
+    'y': np.int32,
+    'panic_level': np.float32,
+    'evacuated': np.bool_,
+    'age': np.int32,
+    'stamina': np.float32,
+    'family_id': np.int32,  # NO_FAMILY for agents without a family
+}
+
+# Log modes: every agent every step; live agents plus one evacuation event row
+# per agent; like 'events' but live agents only when their state changed
+LOG_MODES = ('full', 'events', 'delta')
+
+
+def records_frame(columns):
+    """Wrap log columns in a DataFrame without copying them.
+
+    family_id becomes a nullable integer column with NO_FAMILY shown as missing.
+    """
+    data = dict(columns)
+    family_ids = data['family_id']
+    data['family_id'] = pd.arrays.IntegerArray(family_ids, family_ids == NO_FAMILY)
+    return pd.DataFrame(data, copy=False)
+
+
+def empty_block():
+    """Agent columns (all but timestep) with no records."""
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in LOG_COLUMNS.items() if name != 'timestep'}
+
+
+def population_block(population, rows):
+    """Agent columns for the given AgentPopulation rows."""
+    return {
+        'agent_id': population.id[rows],
+        'x': population.x[rows],
+        'y': population.y[rows],
+        'panic_level': population.panic[rows],
+        'evacuated': population.evacuated[rows],
+        'age': population.age[rows],
+        'stamina': population.stamina[rows],
+        'family_id': population.family_id[rows],
+    }
+
+
+def agent_block(agents):
+    """Agent columns for a list of CAAgent instances."""
+    return {
+        'agent_id': [a.id for a in agents],
+        'x': [a.x for a in agents],
+        'y': [a.y for a in agents],
+        'panic_level': [a.panic_level for a in agents],
+        'evacuated': [a.evacuated for a in agents],
+        'age': [a.age for a in agents],
+        'stamina': [a.stamina for a in agents],
+        'family_id': [NO_FAMILY if a.family_id is None else a.family_id for a in agents],
+    }
+
+
+def logged_panic(block):
+    """Panic values of a block as stored in the log (float32)."""
+    return np.asarray(block['panic_level'], dtype=LOG_COLUMNS['panic_level']).astype(float)
+
+
+class DeltaFilter:
+    """Pick the live agents that 'delta' mode logs.
+
+    Keeps the last logged x, y, panic and stamina per population row. A
+    row is logged when it was never logged, moved, or its panic or
+    stamina changed by more than tolerance since its last logged row.
+    """
+
+    def __init__(self, tolerance):
+        """Initialize with no rows logged yet."""
+        self.tolerance = tolerance
+        self._last_logged = None
+
+    def changed(self, population, rows):
+        """Mask of rows to log, updating their last logged state."""
+        last = self._last_logged
+        if last is None or len(last['logged']) < population.size:
+            grown = {
+                'logged': np.zeros(population.size, dtype=bool),
+                'x': np.zeros(population.size, dtype=np.int32),
+                'y': np.zeros(population.size, dtype=np.int32),
+                'panic': np.zeros(population.size),
+                'stamina': np.zeros(population.size),
+            }
+            if last is not None:
+                for name, values in last.items():
+                    grown[name][:len(values)] = values
+            self._last_logged = last = grown
+
+        x, y = population.x[rows], population.y[rows]
+        panic, stamina = population.panic[rows], population.stamina[rows]
+        changed = (~last['logged'][rows] | (x != last['x'][rows]) | (y != last['y'][rows])
+                   | (np.abs(panic - last['panic'][rows]) > self.tolerance)
+                   | (np.abs(stamina - last['stamina'][rows]) > self.tolerance))
+
+        logged_rows = rows[changed]
+        last['logged'][logged_rows] = True
+        last['x'][logged_rows] = x[changed]
+        last['y'][logged_rows] = y[changed]
+        last['panic'][logged_rows] = panic[changed]
+        last['stamina'][logged_rows] = stamina[changed]
+        return changed
+
+
+class HeatmapAccumulator:
+    """Per-cell running sums behind the logger's heatmaps.
+
+    Each logged step adds its records with np.add.at, so the heatmaps are
+    available in O(cells) at any time without keeping trajectories.
+    Evacuated agents repeat their frozen final record every later step;
+    rather than re-adding them each step, they are counted once together
+    with the step they froze at and weighted by the steps logged since.
+    """
+
+    def __init__(self, width, height):
+        """Initialize empty sums for a width x height grid."""
+        self.width = width
+        self.height = height
+        cells = width * height
+        self.steps = 0  # Logged steps
+        self.max_timestep = None  # Highest timestep with records
+        self.visits = np.zeros(cells, dtype=np.int64)  # Records per cell
+        self.panic_sum = np.zeros(cells)  # Sum of logged panic per cell
+        self.dwell = np.zeros(cells, dtype=np.int64)  # Agent-steps of agents still inside
+
+        # Frozen records per cell, and the sum of the step indices they froze at
+        self.frozen_visits = np.zeros(cells, dtype=np.int64)
+        self.frozen_visit_steps = np.zeros(cells, dtype=np.int64)
+        self.frozen_panic = np.zeros(cells)
+        self.frozen_panic_steps = np.zeros(cells)
+
+    def _cells(self, xs, ys, *values):
+        """Flat cell index of in-bounds records, with values filtered alike."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        return (xs[inside] * self.height + ys[inside],) + tuple(np.asarray(v)[inside] for v in values)
+
+    def add(self, xs, ys, panic, live):
+        """Add records logged at the current step.
+
+        Args:
+            xs, ys: Record positions
+            panic: Logged panic per record
+            live: Per record, True if the agent has not evacuated
+        """
+        cells, panic, live = self._cells(xs, ys, panic, live)
+        np.add.at(self.visits, cells, 1)
+        np.add.at(self.panic_sum, cells, panic)
+        np.add.at(self.dwell, cells[live], 1)
+
+    def freeze(self, xs, ys, panic):
+        """Add records repeated unchanged from the current step until the end."""
+        cells, panic = self._cells(xs, ys, panic)
+        np.add.at(self.frozen_visits, cells, 1)
+        np.add.at(self.frozen_visit_steps, cells, self.steps)
+        np.add.at(self.frozen_panic, cells, panic)
+        np.add.at(self.frozen_panic_steps, cells, panic * self.steps)
+
+    def end_step(self, timestep, logged):
+        """Close the current step, which logged any records if logged is True."""
+        if logged:
+            self.max_timestep = timestep if self.max_timestep is None else max(self.max_timestep, timestep)
+        self.steps += 1
+
+    def totals(self):
+        """Records and panic sum per cell over all logged steps, frozen records included.
+
+        Returns:
+            (visits, panic_sum) 2D arrays
+        """
+        visits = self.visits + self.frozen_visits * self.steps - self.frozen_visit_steps
+        panic_sum = self.panic_sum + (self.frozen_panic * self.steps - self.frozen_panic_steps)
+        shape = (self.width, self.height)
+        return visits.reshape(shape), panic_sum.reshape(shape)
 
 
 class CALogger:
-    """Log agent states and statistics during CA simulation."""
+    """Log agent states and statistics during CA simulation.
+
+    Agent records are stored column by column in typed NumPy arrays whose
+    capacity doubles when full, so a record costs about 30 bytes instead
+    of a dict. to_dataframe() wraps the filled part of the arrays without
+    copying them.
+
+    In 'full' mode evacuated agents repeat their final record every step.
+    The sparse modes drop those repeats: 'events' logs live agents plus
+    one row per agent at the step it evacuated, and 'delta' additionally
+    skips live agents whose position is unchanged and whose panic and
+    stamina moved by at most tolerance since their last logged row. An
+    agent's state at any step is its latest row up to that step; summary
+    and heatmaps give the same results in every mode.
+    """
 
-    def __init__(self):
-        """Initialize logger."""
-        self.records = []  # List of agent records
+    def __init__(self, capacity=4096, mode='full', tolerance=1e-3):
+        """Initialize logger.
+
+        Args:
+            capacity: Initial room for agent records
+            mode: One of LOG_MODES; the sparse modes need an AgentPopulation in log_step
+            tolerance: Panic/stamina change that triggers a row in 'delta' mode
+        """
+        if mode not in LOG_MODES:
+            raise ValueError(f"Unknown log mode '{mode}', expected one of {LOG_MODES}")
+        self.mode = mode
+        self.tolerance = tolerance
+        self.size = 0  # Number of agent records
+        self._capacity = max(1, capacity)
+        self._columns = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in LOG_COLUMNS.items()}
         self.timesteps = []  # List of timestep statistics
 
+        # Final records of evacuated agents; their state no longer changes
+        self._frozen = empty_block()
+        self._frozen_count = 0  # Entries of population.evacuation_order already frozen
+
+        # Heatmap sums, sized from the first logged grid
+        self.heatmaps = None
+
+        # Rows worth logging in 'delta' mode
+        self._delta = DeltaFilter(tolerance)
+
+        # TrajectoryIndex of the records, and the number of logged steps it covers
+        self._trajectory_index = None
+        self._trajectory_index_steps = None
+
     def log_step(self, timestep, agents, grid, statistics):
         """Log all agents at a timestep.
 
         Args:
             timestep: Current simulation step
-            agents: List of CAAgent instances
+            agents: AgentPopulation or list of CAAgent instances
             grid: CAGrid instance
             statistics: Dict of current statistics
         """
-        # Record each agent's state
-        for agent in agents:
-            record = {
-                'timestep': timestep,
-                'agent_id': agent.id,
-                'x': agent.x,
-                'y': agent.y,
-                'panic_level': agent.panic_level,
-                'evacuated': agent.evacuated,
-                'age': agent.age,
-                'stamina': agent.stamina,
-                'family_id': agent.family_id,
-            }
-            self.records.append(record)
+        if self.heatmaps is None:
+            self.heatmaps = HeatmapAccumulator(grid.width, grid.height)
+        heatmaps = self.heatmaps
+
+        if isinstance(agents, AgentPopulation):
+            # Read live agents only; evacuated agents repeat their frozen final record
+            newly_evacuated = np.array(agents.evacuation_order[self._frozen_count:], dtype=np.int64)
+            if newly_evacuated.size:
+                block = population_block(agents, newly_evacuated)
+                self._frozen = {name: np.concatenate([self._frozen[name], block[name]]) for name in block}
+                heatmaps.freeze(block['x'], block['y'], logged_panic(block))
+            self._frozen_count = len(agents.evacuation_order)
+
+            block = population_block(agents, agents.active_rows)
+            if self.mode == 'full':
+                self._append(timestep, block)
+                self._append(timestep, self._frozen)
+            else:
+                if self.mode == 'delta':
+                    changed = self._delta.changed(agents, agents.active_rows)
+                    self._append(timestep, {name: values[changed] for name, values in block.items()})
+                else:
+                    self._append(timestep, block)
+                if newly_evacuated.size:
+                    self._append(timestep, population_block(agents, newly_evacuated))
+            heatmaps.add(block['x'], block['y'], logged_panic(block), np.ones(len(block['x']), dtype=bool))
+            logged = len(block['x']) + len(self._frozen['x']) > 0
+        else:
+            if self.mode != 'full':
+                raise ValueError(f"Log mode '{self.mode}' needs an AgentPopulation")
+            # Record each agent's state
+            block = agent_block(agents)
+            self._append(timestep, block)
+            heatmaps.add(block['x'], block['y'], logged_panic(block), ~np.array(block['evacuated'], dtype=bool))
+            logged = len(block['x']) > 0
+
+        heatmaps.end_step(timestep, logged)
 
         # Record timestep statistics
+        self._log_statistics(statistics)
+
+    def _log_statistics(self, statistics):
+        """Keep one timestep's statistics."""
         self.timesteps.append(statistics)
 
+    def _append(self, timestep, block):
+        """Append a block of agent columns, all logged at timestep."""
+        count = len(block['agent_id'])
+        if count == 0:
+            return
+        if self.size + count > self._capacity:
+            self._grow(max(self._capacity * 2, self.size + count))
+
+        end = self.size + count
+        self._columns['timestep'][self.size:end] = timestep
+        for name, values in block.items():
+            self._columns[name][self.size:end] = values
+        self.size = end
+
+    def _grow(self, capacity):
+        """Reallocate all columns with a larger capacity."""
+        for name, data in self._columns.items():
+            grown = np.zeros(capacity, dtype=data.dtype)
+            grown[:self.size] = data[:self.size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def to_dataframe(self):
+        """Get agent records as a DataFrame.
+
+        The columns are views of the logger's arrays, not copies (see records_frame).
+        """
+        return records_frame({name: values[:self.size] for name, values in self._columns.items()})
+
+    @property
+    def records(self):
+        """Agent records as a list of dicts (builds Python objects; prefer to_dataframe)."""
+        return self.to_dataframe().to_dict('records')
+
     def save_to_csv(self, output_path):
         """Save agent trajectories to CSV.
 
@@ -50,11 +335,11 @@ class CALogger:
         """
         os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
 
-        df = pd.DataFrame(self.records)
+        df = self.to_dataframe()
 
-        # Ensure timestep is first column and sorted
-        if not df.empty:
-            df = df.sort_values('timestep')
+        # Ensure timestep is first column and sorted (steps are normally logged in order)
+        if not df['timestep'].is_monotonic_increasing:
+            df = df.sort_values('timestep', kind='stable')
 
         df.to_csv(output_path, index=False)
         return df
@@ -76,11 +361,10 @@ class CALogger:
 
     def get_summary_stats(self):
         """Get overall simulation summary statistics."""
-        if not self.records:
+        df = self.to_dataframe()
+        if df.empty:
             return {}
 
-        df = pd.DataFrame(self.records)
-
         evacuation_time = None
         if any(df['evacuated']):
             first_evacuation = df[df['evacuated']]['timestep'].min()
@@ -89,8 +373,13 @@ class CALogger:
         total_evacuated = len(df[df['evacuated']]['agent_id'].unique())
         total_agents = df['agent_id'].nunique()
 
-        avg_panic_final = df[df['timestep'] == df['timestep'].max()]['panic_level'].mean()
-        max_panic_final = df[df['timestep'] == df['timestep'].max()]['panic_level'].max()
+        # Final state of every agent: its latest row (in 'full' mode, the last step's rows)
+        final_panic = df.drop_duplicates('agent_id', keep='last')['panic_level'].astype(float)
+        avg_panic_final = final_panic.mean()
+        max_panic_final = final_panic.max()
+        total_timesteps = df['timestep'].max()
+        if self.heatmaps is not None and self.heatmaps.max_timestep is not None:
+            total_timesteps = self.heatmaps.max_timestep  # Sparse modes may log no rows in the last steps
 
         return {
             'total_agents': total_agents,
@@ -99,13 +388,21 @@ class CALogger:
             'evacuation_time': evacuation_time,
             'avg_panic_final': avg_panic_final,
             'max_panic_final': max_panic_final,
-            'total_timesteps': df['timestep'].max(),
+            'total_timesteps': total_timesteps,
         }
 
     def get_agent_trajectory(self, agent_id):
         """Get complete trajectory for specific agent."""
-        df = pd.DataFrame(self.records)
-        return df[df['agent_id'] == agent_id].sort_values('timestep')
+        return self.get_trajectory_index().get_agent_trajectory(agent_id)
+
+    def get_trajectory_index(self):
+        """Get a TrajectoryIndex of the records, rebuilt only after new steps are logged."""
+        from analysis.ca_trajectory import TrajectoryIndex  # ca_trajectory imports this module
+
+        if self._trajectory_index is None or self._trajectory_index_steps != len(self.timesteps):
+            self._trajectory_index = TrajectoryIndex.from_logger(self)
+            self._trajectory_index_steps = len(self.timesteps)
+        return self._trajectory_index
 
     def get_crowding_heatmap(self, width, height):
         """Generate crowding heatmap from agent positions.
@@ -117,25 +414,45 @@ class CALogger:
         Returns:
             2D numpy array of crowding density
         """
-        if not self.records:
+        if self.heatmaps is None or self.heatmaps.max_timestep is None:
             return np.zeros((width, height))
 
-        df = pd.DataFrame(self.records)
-
-        # Count agents at each position across all timesteps
-        heatmap = np.zeros((width, height))
-        for _, row in df.iterrows():
-            x, y = int(row['x']), int(row['y'])
-            if 0 <= x < width and 0 <= y < height:
-                heatmap[x, y] += 1
+        # Agents at each position across all timesteps
+        visits, _ = self.heatmaps.totals()
+        heatmap = self._fit(visits, width, height).astype(float)
 
         # Normalize by number of timesteps
-        max_count = df['timestep'].max() + 1
+        max_count = self.heatmaps.max_timestep + 1
         if max_count > 0:
             heatmap = heatmap / max_count
 
         return heatmap
 
+    def get_dwell_heatmap(self, width, height):
+        """Generate dwell-time heatmap: agent-steps spent in each cell before evacuating.
+
+        Args:
+            width: Grid width
+            height: Grid height
+
+        Returns:
+            2D numpy array of agent-steps per cell
+        """
+        if self.heatmaps is None:
+            return np.zeros((width, height), dtype=np.int64)
+        dwell = self.heatmaps.dwell.reshape(self.heatmaps.width, self.heatmaps.height)
+        return self._fit(dwell, width, height)
+
+    @staticmethod
+    def _fit(values, width, height):
+        """Crop or zero-pad a per-cell array to width x height."""
+        if values.shape == (width, height):
+            return values
+        fitted = np.zeros((width, height), dtype=values.dtype)
+        w, h = min(width, values.shape[0]), min(height, values.shape[1])
+        fitted[:w, :h] = values[:w, :h]
+        return fitted
+
     def get_panic_heatmap(self, width, height):
         """Generate panic level heatmap.
 
@@ -146,20 +463,13 @@ class CALogger:
         Returns:
             2D numpy array of average panic levels
         """
-        if not self.records:
+        if self.heatmaps is None or self.heatmaps.max_timestep is None:
             return np.zeros((width, height))
 
-        df = pd.DataFrame(self.records)
-
         # Average panic level at each position
-        heatmap = np.zeros((width, height))
-        counts = np.zeros((width, height))
-
-        for _, row in df.iterrows():
-            x, y = int(row['x']), int(row['y'])
-            if 0 <= x < width and 0 <= y < height:
-                heatmap[x, y] += row['panic_level']
-                counts[x, y] += 1
+        counts, heatmap = self.heatmaps.totals()
+        counts = self._fit(counts, width, height)
+        heatmap = self._fit(heatmap, width, height)
 
         # Average
         with np.errstate(divide='ignore', invalid='ignore'):
@@ -0,0 +1,131 @@
+"""Post-processing after a CA run: exporters and plots run concurrently on shared inputs."""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from io_manager.excel_writer import create_output_workbook
+
+# Artifact name -> file name in the output directory
+OUTPUT_FILES = {
+    'trajectories': "ca_simulation_log.csv",
+    'statistics': "ca_statistics.csv",
+    'exits': "ca_exit_statistics.csv",
+    'workbook': "ca_simulation_results.xlsx",
+    'heatmap': "ca_heatmap.png",
+}
+
+
+def prepare_outputs(sim, logger):
+    """Compute the inputs shared by all exporters, once.
+
+    Args:
+        sim: Finished CASimulation
+        logger: CALogger that recorded the run
+
+    Returns:
+        Dict with 'records' (agent records DataFrame, sorted by timestep),
+        'statistics' and 'exits' DataFrames, and the 'crowding' and 'panic'
+        heatmaps
+    """
+    records = logger.to_dataframe()
+    if not records['timestep'].is_monotonic_increasing:
+        records = records.sort_values('timestep', kind='stable')  # Steps are normally logged in order
+    return {
+        'records': records,
+        'statistics': pd.DataFrame(logger.timesteps),
+        'exits': pd.DataFrame(sim.get_exit_statistics()),
+        'crowding': logger.get_crowding_heatmap(sim.width, sim.height),
+        'panic': logger.get_panic_heatmap(sim.width, sim.height),
+    }
+
+
+def render_heatmaps(crowding, panic, output_path):
+    """Render crowding and panic heatmaps side by side to a PNG.
+
+    Uses a Figure with its own Agg canvas rather than pyplot, so several
+    plots can render at once from different threads.
+    """
+    fig = Figure(figsize=(14, 6))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, 2)
+
+    # Crowding heatmap
+    im1 = axes[0].imshow(crowding.T, cmap='hot', origin='lower')
+    axes[0].set_title('Crowding Density Heatmap')
+    axes[0].set_xlabel('X')
+    axes[0].set_ylabel('Y')
+    fig.colorbar(im1, ax=axes[0], label='Visits per timestep')
+
+    # Panic heatmap
+    im2 = axes[1].imshow(panic.T, cmap='RdYlGn_r', origin='lower', vmin=0, vmax=1)
+    axes[1].set_title('Panic Level Heatmap')
+    axes[1].set_xlabel('X')
+    axes[1].set_ylabel('Y')
+    fig.colorbar(im2, ax=axes[1], label='Average Panic Level')
+
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=100)
+
+
+def _write_workbook(sim, records, output_path, excel_writer):
+    """Finish the streamed workbook, or build one from the records."""
+    if excel_writer is not None:
+        excel_writer.close(sim)
+    else:
+        create_output_workbook(sim, records, output_path)
+
+
+def run_postprocessing(sim, logger, output_dir, excel_writer=None, max_workers=None):
+    """Write all run artifacts concurrently.
+
+    The shared inputs are computed once up front (prepare_outputs); then the
+    CSV exporters, the Excel workbook and the heatmap render run on a thread
+    pool, so the total time is about that of the slowest one. Threads
+    rather than processes: the exporters share the in-memory records and,
+    when streaming, the open write-only workbook, which a process pool
+    would have to copy or could not pickle.
+
+    Args:
+        sim: Finished CASimulation
+        logger: CALogger that recorded the run
+        output_dir: Directory for the artifacts (see OUTPUT_FILES)
+        excel_writer: StreamingExcelWriter used during the run, closed here;
+            None builds the workbook from the records instead
+        max_workers: Thread pool size (default: one thread per artifact)
+
+    Returns:
+        (outputs, errors): {artifact: (path, seconds)} for artifacts written,
+        {artifact: exception} for artifacts that failed
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, file_name) for name, file_name in OUTPUT_FILES.items()}
+    shared = prepare_outputs(sim, logger)
+
+    if excel_writer is not None:
+        paths['workbook'] = excel_writer.output_path  # Saved by close() to the path it was created with
+
+    tasks = {
+        'trajectories': lambda path: shared['records'].to_csv(path, index=False),
+        'statistics': lambda path: shared['statistics'].to_csv(path, index=False),
+        'exits': lambda path: shared['exits'].to_csv(path, index=False),
+        'workbook': lambda path: _write_workbook(sim, shared['records'], path, excel_writer),
+        'heatmap': lambda path: render_heatmaps(shared['crowding'], shared['panic'], path),
+    }
+
+    def timed(name):
+        start = time.perf_counter()
+        tasks[name](paths[name])
+        return paths[name], time.perf_counter() - start
+
+    outputs = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks), thread_name_prefix="ca-postprocess") as pool:
+        futures = {name: pool.submit(timed, name) for name in tasks}
+        for name, future in futures.items():
+            try:
+                outputs[name] = future.result()
+            except Exception as error:  # Reported per artifact; the others are still written
+                errors[name] = error
+    return outputs, errors
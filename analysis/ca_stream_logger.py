@@ -0,0 +1,306 @@
+"""Streaming CA logger: agent records and statistics flushed to disk in chunks by a background thread."""
+import glob
+import gzip
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from analysis.ca_logger import CALogger, LOG_COLUMNS, records_frame
+from core.ca.ca_population import NO_FAMILY
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+# Output formats: gzip CSV file, directory of compressed NPZ chunks, Parquet file
+STREAM_FORMATS = ('csv', 'npz', 'parquet')
+DEFAULT_CHUNK_SIZE = 1 << 20  # Agent records per chunk (~30 MB in memory)
+STATISTICS_CHUNK_SIZE = 4096  # Timestep statistics buffered before they are written
+
+
+class _CSVChunkWriter:
+    """Appends chunks to one gzip-compressed CSV file."""
+
+    def __init__(self, output_path, frame=records_frame):
+        self.file = gzip.open(output_path, 'wt', compresslevel=6, newline='')
+        self.frame = frame
+        self.header = True
+
+    def write(self, columns):
+        self.frame(columns).to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _NPZChunkWriter:
+    """Writes each chunk as a compressed NPZ file in one directory."""
+
+    def __init__(self, output_path, prefix='chunk'):
+        os.makedirs(output_path, exist_ok=True)
+        self.output_path = output_path
+        self.prefix = prefix
+        self.count = 0
+
+    def write(self, columns):
+        np.savez_compressed(os.path.join(self.output_path, f"{self.prefix}_{self.count:06d}.npz"), **columns)
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class _ParquetChunkWriter:
+    """Writes each chunk as a row group of one Parquet file.
+
+    Without a schema (statistics), the file is created from the first chunk.
+    """
+
+    def __init__(self, output_path, columns=LOG_COLUMNS):
+        self.output_path = output_path
+        self.writer = None
+        if columns is not None:
+            schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(np.dtype(dtype))) for name, dtype in columns.items()])
+            self.writer = pq.ParquetWriter(output_path, schema, compression='zstd')
+
+    def write(self, columns):
+        arrays = [pyarrow.array(values, mask=values == NO_FAMILY if name == 'family_id' else None)
+                  for name, values in columns.items()]
+        table = pyarrow.Table.from_arrays(arrays, names=list(columns))
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.output_path, table.schema, compression='zstd')
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+_CHUNK_WRITERS = {'csv': _CSVChunkWriter, 'npz': _NPZChunkWriter, 'parquet': _ParquetChunkWriter}
+_STATISTICS_WRITERS = {
+    'csv': lambda path: _CSVChunkWriter(path, frame=pd.DataFrame),
+    'npz': lambda path: _NPZChunkWriter(path, prefix='statistics'),
+    'parquet': lambda path: _ParquetChunkWriter(path, columns=None),
+}
+
+
+def default_statistics_path(output_path, format='csv'):
+    """Where StreamingCALogger writes the timestep statistics of the log at output_path.
+
+    NPZ statistics chunks go into the log directory itself; CSV and Parquet
+    logs get a sibling file, e.g. run.csv.gz -> run_statistics.csv.gz.
+    """
+    if format == 'npz':
+        return output_path
+    stem = output_path
+    for suffix in ('.gz', '.csv', '.parquet'):
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+    return stem + ('_statistics.parquet' if format == 'parquet' else '_statistics.csv.gz')
+
+
+def read_log(path):
+    """Read a log written by StreamingCALogger back into a DataFrame.
+
+    Args:
+        path: Gzip CSV file, Parquet file or directory of NPZ chunks
+
+    Returns:
+        DataFrame with the same columns as CALogger.to_dataframe()
+    """
+    if os.path.isdir(path):
+        chunks = []
+        for chunk_path in sorted(glob.glob(os.path.join(path, "chunk_*.npz"))):
+            with np.load(chunk_path) as chunk:
+                chunks.append({name: chunk[name] for name in LOG_COLUMNS})
+        if not chunks:
+            return records_frame({name: np.zeros(0, dtype=dtype) for name, dtype in LOG_COLUMNS.items()})
+        return records_frame({name: np.concatenate([chunk[name] for chunk in chunks]) for name in LOG_COLUMNS})
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+        df['family_id'] = df['family_id'].astype('Int32')
+        return df
+    dtypes = dict(LOG_COLUMNS, family_id='Int32')
+    return pd.read_csv(path, dtype=dtypes)
+
+
+def read_statistics(path):
+    """Read timestep statistics written by StreamingCALogger back into a DataFrame.
+
+    Args:
+        path: default_statistics_path() of the log, or the logger's statistics_path
+
+    Returns:
+        DataFrame with one row per logged timestep, as CALogger.save_statistics_csv
+    """
+    if os.path.isdir(path):
+        chunks = []
+        for chunk_path in sorted(glob.glob(os.path.join(path, "statistics_*.npz"))):
+            with np.load(chunk_path) as chunk:
+                chunks.append(pd.DataFrame({name: chunk[name] for name in chunk.files}))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    if not os.path.exists(path):
+        return pd.DataFrame()  # Parquet statistics file is only created with the first chunk
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    try:
+        return pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+class StreamingCALogger(CALogger):
+    """CALogger that streams agent records to disk instead of keeping them.
+
+    Records are collected in column chunks of chunk_size rows; each full
+    chunk is handed to a background thread that compresses and writes it
+    while the simulation carries on. At most max_pending chunks wait for
+    the writer, so memory use stays bounded however many steps run.
+
+    Timestep statistics are streamed the same way to statistics_path, with
+    each record chunk or every STATISTICS_CHUNK_SIZE steps; self.timesteps
+    stays empty. Read them back with read_statistics().
+
+    Use as a context manager, or call close() after the run to write the
+    last chunk.
+    """
+
+    def __init__(self, output_path, format='csv', chunk_size=DEFAULT_CHUNK_SIZE, max_pending=2,
+                 mode='full', tolerance=1e-3, statistics_path=None):
+        """Initialize streaming logger.
+
+        Args:
+            output_path: Gzip CSV file ('csv'), Parquet file ('parquet') or
+                directory for NPZ chunks ('npz')
+            format: One of STREAM_FORMATS; 'parquet' needs pyarrow
+            chunk_size: Agent records per chunk
+            max_pending: Chunks that may wait for the writer before logging blocks
+            mode, tolerance: Log mode, see CALogger
+            statistics_path: Where timestep statistics go (default: default_statistics_path(output_path, format))
+        """
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"Unknown log format '{format}', expected one of {STREAM_FORMATS}")
+        if format == 'parquet' and pyarrow is None:
+            raise ImportError("The 'parquet' log format requires pyarrow to be installed")
+
+        super().__init__(capacity=chunk_size, mode=mode, tolerance=tolerance)
+        self.output_path = output_path
+        self.format = format
+        self.chunk_size = chunk_size
+        self.statistics_path = statistics_path or default_statistics_path(output_path, format)
+        self.rows_written = 0  # Agent records handed to the writer
+        self.steps_written = 0  # Timestep statistics handed to the writer
+        self.closed = False
+        self._statistics = []  # Timestep statistics not yet handed to the writer
+
+        if format != 'npz':
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            os.makedirs(os.path.dirname(self.statistics_path) or '.', exist_ok=True)
+        self._writer = _CHUNK_WRITERS[format](output_path)
+        self._statistics_writer = _STATISTICS_WRITERS[format](self.statistics_path)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_chunks, name="ca-log-writer", daemon=True)
+        self._thread.start()
+
+    def _append(self, timestep, block):
+        """Append a block of agent columns, flushing the chunk once it is full."""
+        super()._append(timestep, block)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def _log_statistics(self, statistics):
+        """Buffer one timestep's statistics, flushing them once the buffer is full."""
+        self._statistics.append(statistics)
+        if len(self._statistics) >= STATISTICS_CHUNK_SIZE:
+            self._flush_statistics()
+
+    def _flush_statistics(self):
+        """Hand the buffered timestep statistics to the writer thread as typed columns."""
+        if not self._statistics:
+            return
+        chunk = {name: np.array([statistics[name] for statistics in self._statistics])
+                 for name in self._statistics[0]}
+        self._queue.put((self._statistics_writer, chunk))
+        self.steps_written += len(self._statistics)
+        self._statistics = []
+
+    def flush(self):
+        """Hand the buffered records and statistics to the writer thread."""
+        self._raise_writer_error()
+        self._flush_statistics()
+        if self.size == 0:
+            return
+        chunk = {name: values[:self.size] for name, values in self._columns.items()}
+        self._queue.put((self._writer, chunk))
+        self.rows_written += self.size
+
+        # Fresh buffers: the writer owns the old ones now
+        self._columns = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in LOG_COLUMNS.items()}
+        self.size = 0
+
+    def close(self):
+        """Write the remaining records and wait for the writer to finish."""
+        if self.closed:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.close()
+        self._statistics_writer.close()
+        self.closed = True
+        self._raise_writer_error()
+
+    def _write_chunks(self):
+        """Writer thread: write chunks until the None sentinel arrives."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is None:
+                writer, chunk = item
+                try:
+                    writer.write(chunk)
+                except Exception as error:  # Reported to the simulation thread by _raise_writer_error
+                    self._error = error
+
+    def _raise_writer_error(self):
+        """Re-raise a write error from the writer thread."""
+        if self._error is not None:
+            raise RuntimeError(f"Writing {self.output_path} failed") from self._error
+
+    def to_dataframe(self):
+        """Read all logged records back from disk (after close())."""
+        if not self.closed:
+            raise RuntimeError("Close the StreamingCALogger before reading its records back")
+        return read_log(self.output_path)
+
+    def save_to_csv(self, output_path):
+        """Save agent trajectories to CSV (reads the streamed log back; after close())."""
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        df = self.to_dataframe()
+        df.to_csv(output_path, index=False)
+        return df
+
+    def statistics_dataframe(self):
+        """Read all timestep statistics back from disk (after close())."""
+        if not self.closed:
+            raise RuntimeError("Close the StreamingCALogger before reading its statistics back")
+        return read_statistics(self.statistics_path)
+
+    def save_statistics_csv(self, output_path):
+        """Save timestep statistics to CSV (reads the streamed statistics back; after close())."""
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        df = self.statistics_dataframe()
+        df.to_csv(output_path, index=False)
+        return df
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
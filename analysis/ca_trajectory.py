@@ -0,0 +1,87 @@
+"""Trajectory store indexed by agent and by timestep."""
+import numpy as np
+from analysis.ca_logger import LOG_COLUMNS, records_frame
+from analysis.ca_stream_logger import read_log
+from core.ca.ca_population import NO_FAMILY
+
+
+class TrajectoryIndex:
+    """Agent records sorted by agent, with offsets for per-agent and per-step lookups.
+
+    Records are stored column by column, sorted by (agent_id, timestep),
+    so each agent's trajectory is one contiguous slice. A second index
+    lists the records of each timestep, in the order they were logged.
+    Both lookups cost a binary search plus the size of the result.
+    """
+
+    def __init__(self, records):
+        """Build index from agent records.
+
+        Args:
+            records: DataFrame with the CALogger columns (e.g. CALogger.to_dataframe())
+        """
+        columns = {}
+        for name, dtype in LOG_COLUMNS.items():
+            if name == 'family_id':
+                values = records[name].astype('Int32').to_numpy(dtype=dtype, na_value=NO_FAMILY)
+            else:
+                values = records[name].to_numpy(dtype=dtype)
+            columns[name] = values
+
+        # Per-agent storage order
+        order = np.lexsort((columns['timestep'], columns['agent_id']))
+        self._columns = {name: values[order] for name, values in columns.items()}
+        agent_ids = self._columns['agent_id']
+        starts = np.flatnonzero(np.r_[True, agent_ids[1:] != agent_ids[:-1]]) if len(order) else np.zeros(0, np.int64)
+        self.agent_ids = agent_ids[starts]
+        self._agent_offsets = np.append(starts, len(order))
+
+        # Per-step index into storage, keeping logged order within a step
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        by_step = np.argsort(columns['timestep'], kind='stable')
+        self._step_rows = position[by_step]
+        steps = columns['timestep'][by_step]
+        starts = np.flatnonzero(np.r_[True, steps[1:] != steps[:-1]]) if len(order) else np.zeros(0, np.int64)
+        self.timesteps = steps[starts]
+        self._step_offsets = np.append(starts, len(order))
+
+    @classmethod
+    def from_logger(cls, logger):
+        """Build index from a CALogger's records."""
+        return cls(logger.to_dataframe())
+
+    @classmethod
+    def from_file(cls, path):
+        """Build index from a saved log: ca_simulation_log.csv or a StreamingCALogger output."""
+        return cls(read_log(path))
+
+    def __len__(self):
+        return len(self._columns['agent_id'])
+
+    def get_agent_trajectory(self, agent_id):
+        """Get one agent's records, sorted by timestep (empty if unknown)."""
+        i = np.searchsorted(self.agent_ids, agent_id)
+        if i == len(self.agent_ids) or self.agent_ids[i] != agent_id:
+            return self._frame(slice(0, 0))
+        return self._frame(slice(self._agent_offsets[i], self._agent_offsets[i + 1]))
+
+    def get_timestep(self, timestep):
+        """Get all records logged at one timestep, in logged order (empty if none)."""
+        i = np.searchsorted(self.timesteps, timestep)
+        if i == len(self.timesteps) or self.timesteps[i] != timestep:
+            return self._frame(slice(0, 0))
+        return self._frame(self._step_rows[self._step_offsets[i]:self._step_offsets[i + 1]])
+
+    def iter_agents(self):
+        """Yield (agent_id, trajectory DataFrame) for every agent, in id order."""
+        for i, agent_id in enumerate(self.agent_ids.tolist()):
+            yield agent_id, self._frame(slice(self._agent_offsets[i], self._agent_offsets[i + 1]))
+
+    def _frame(self, index):
+        """Records at a storage slice (views) or index array (copies) as a DataFrame."""
+        return records_frame({name: values[index] for name, values in self._columns.items()})
+
+    def to_dataframe(self):
+        """All records, sorted by agent then timestep."""
+        return self._frame(slice(None))
@@ -0,0 +1,93 @@
+"""Benchmark CA engine modes and kernel backends on a generated layout."""
+import argparse
+import time
+import numpy as np
+from core.ca.ca_engine import CASimulation
+from core.ca.ca_grid import CELL_WALL, CELL_EXIT
+from core.ca.ca_kernels import NUMBA_AVAILABLE
+from core.ca.ca_population import COLUMNS
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Time the reference loop against the vectorized kernel backends.")
+    parser.add_argument('--size', type=int, default=200, help="grid width and height (default: %(default)s)")
+    parser.add_argument('--agents', type=int, default=5000, help="number of agents (default: %(default)s)")
+    parser.add_argument('--steps', type=int, default=20, help="timed steps per engine (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=42, help="random seed (default: %(default)s)")
+    parser.add_argument('--skip-reference', action='store_true', help="only time the vectorized backends")
+    return parser.parse_args()
+
+
+def build_config(size, agents, seed):
+    """Walled square room with an exit door on every side and a partition wall."""
+    grid = np.zeros((size, size), dtype=np.uint8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = CELL_WALL
+    door = slice(size // 2 - 2, size // 2 + 2)
+    grid[door, 0] = grid[door, -1] = grid[0, door] = grid[-1, door] = CELL_EXIT
+    grid[size // 3, size // 4:3 * size // 4] = CELL_WALL
+    return {
+        'width': size,
+        'height': size,
+        'grid_data': grid,
+        'agents': [],
+        'params': {
+            'simulation_steps': 10 ** 9,
+            'initial_population': agents,
+            'panic_spread_rate': 0.05,
+            'panic_decay_rate': 0.01,
+            'crowding_threshold': 5,
+            'random_seed': seed,
+            'exit_capacity': None,
+        },
+    }
+
+
+def time_engine(config, mode, backend, steps):
+    """Run steps of one engine; the first step (JIT compilation, field setup) is timed separately.
+
+    Returns:
+        (first step seconds, mean seconds per later step, final agent state)
+    """
+    sim = CASimulation.from_config(config, mode=mode, backend=backend)
+    start = time.perf_counter()
+    sim.step()
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        sim.step()
+    per_step = (time.perf_counter() - start) / max(1, steps)
+    return first, per_step, sim.agents.get_state()
+
+
+def main():
+    """Time every available engine and check they agree."""
+    args = parse_args()
+    config = build_config(args.size, args.agents, args.seed)
+
+    engines = [('vectorized', 'numpy')]
+    if NUMBA_AVAILABLE:
+        engines.append(('vectorized', 'numba'))
+    else:
+        print("numba is not installed: skipping the numba backend")
+    if not args.skip_reference:
+        engines.insert(0, ('reference', 'numpy'))
+
+    print(f"Grid {args.size} × {args.size}, {args.agents} agents, {args.steps} steps\n")
+    print(f"  {'engine':20s} {'first step':>12s} {'per step':>12s} {'speedup':>9s}")
+    baseline = None
+    states = []
+    for mode, backend in engines:
+        first, per_step, state = time_engine(config, mode, backend, args.steps)
+        baseline = baseline or per_step
+        states.append(state)
+        name = mode if mode == 'reference' else f"{mode}/{backend}"
+        print(f"  {name:20s} {first * 1000:10.1f}ms {per_step * 1000:10.2f}ms {baseline / per_step:8.1f}x")
+
+    identical = all(np.array_equal(states[0][name], state[name]) for state in states[1:] for name in COLUMNS)
+    print(f"\n{'✓' if identical else '✗'} Final agent states {'identical' if identical else 'differ'} across engines")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,27 @@ def check_imports():
         ("matplotlib", "matplotlib"),
         ("pandas", "pandas"),
         ("openpyxl", "openpyxl"),
+        ("scipy", "scipy"),
         ("core.ca.ca_grid", "CA Grid Module"),
+        ("core.ca.ca_fields", "CA Floor Field Module"),
         ("core.ca.ca_agent", "CA Agent Module"),
+        ("core.ca.ca_population", "CA Population Module"),
+        ("core.ca.ca_exits", "CA Exit Queue Module"),
         ("core.ca.ca_environment", "CA Environment Module"),
         ("core.ca.ca_behaviors", "CA Behaviors Module"),
         ("core.ca.ca_engine", "CA Engine Module"),
+        ("core.ca.ca_checkpoint", "CA Checkpoint Module"),
+        ("core.ca.ca_layout", "CA Layout Module"),
+        ("core.ca.ca_ensemble", "CA Ensemble Module"),
+        ("core.ca.ca_sweep", "CA Sweep Module"),
+        ("core.ca.ca_distributed", "CA Distributed Module"),
+        ("core.ca.ca_kernels", "CA Kernels Module"),
         ("io_manager.excel_parser", "Excel Parser Module"),
         ("io_manager.excel_writer", "Excel Writer Module"),
         ("analysis.ca_logger", "CA Logger Module"),
+        ("analysis.ca_stream_logger", "CA Streaming Logger Module"),
+        ("analysis.ca_trajectory", "CA Trajectory Index Module"),
+        ("analysis.ca_postprocess", "CA Post-processing Module"),
         ("config.ca_settings", "CA Settings Module"),
     ]
 
@@ -1,6 +1,6 @@
 """CA-specific configuration settings."""
 
-# Grid dimensions
+# Grid dimensions for new config templates (parsed configs can be any size)
 GRID_WIDTH = 100
 GRID_HEIGHT = 100
 
@@ -21,10 +21,28 @@ RANDOM_MOVE_PROBABILITY = 0.20
 # High panic threshold for changing movement strategy
 HIGH_PANIC_THRESHOLD = 0.6
 
+# Engine mode: 'vectorized' (batched NumPy) or 'reference' (per-agent loop)
+ENGINE_MODE = 'vectorized'
+
+# Kernel backend for the vectorized mode: 'auto' (numba if installed), 'numpy' or 'numba'
+ENGINE_BACKEND = 'auto'
+
 # Snapshot and output
 SNAPSHOT_INTERVAL = 100  # Save grid snapshot every N steps
+LOG_MODE = 'full'  # Trajectory log: 'full', 'events' (no repeated evacuee rows) or 'delta' (changes only)
 OUTPUT_DIR = "output"
 CONFIG_FILE = "config/museum_ca_config.xlsx"
+LAYOUT_CACHE_DIR = ".layout_cache"  # Compiled layouts keyed by workbook hash (None disables the cache)
+
+# Monte Carlo ensemble (ensemble_ca.py)
+ENSEMBLE_REPLICAS = 32
+
+# Domain-decomposed runs (distributed_ca.py)
+DISTRIBUTED_TILES = 4
 
 # Excel output settings
-TIMESTEP_SNAPSHOT_SKIP = 100  # Save timestep sheets every 100 steps
+EXCEL_EXPORT = 'streaming'  # 'streaming' (write-only, rows written during the run) or 'standard'
+TIMESTEP_SNAPSHOT_SKIP = 100  # Save timestep sheets every 100 steps (streaming export)
+
+# Post-processing threads for the output files (None: one per file)
+POSTPROCESS_WORKERS = None
@@ -1,16 +1,24 @@
 # Cellular Automaton (CA) module for discrete grid-based simulation
 from .ca_grid import CAGrid
 from .ca_agent import CAAgent
+from .ca_population import AgentPopulation
 from .ca_environment import CAEnvironment
 from .ca_behaviors import calculate_cell_attractiveness, select_next_cell, resolve_conflicts
 from .ca_engine import CASimulation
+from .ca_layout import CALayout
+from .ca_checkpoint import save_checkpoint, load_checkpoint, fork_simulation
 
 __all__ = [
     'CAGrid',
     'CAAgent',
+    'AgentPopulation',
     'CAEnvironment',
     'calculate_cell_attractiveness',
     'select_next_cell',
     'resolve_conflicts',
     'CASimulation',
+    'CALayout',
+    'save_checkpoint',
+    'load_checkpoint',
+    'fork_simulation',
 ]
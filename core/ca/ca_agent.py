@@ -1,49 +1,84 @@
 """Discrete grid agent for cellular automaton simulation."""
-import random
+import numpy as np
+
+from .ca_population import AgentPopulation, NO_FAMILY
+
+
+def _column_attribute(name, convert):
+    """Property reading/writing one population column at this agent's row."""
+    def getter(self):
+        return convert(self.population._columns[name][self.index])
+
+    def setter(self, value):
+        self.population._columns[name][self.index] = value
+
+    return property(getter, setter)
+
+
+# Fallback generator for ages of agents created without one
+_default_rng = np.random.default_rng()
 
 
 class CAAgent:
-    """Agent on discrete cellular grid."""
+    """Agent on discrete cellular grid.
+
+    A lightweight view of one row in an AgentPopulation; all state lives
+    in the population's columns. Agents created without a population get
+    a private one, so standalone use works as before.
+    """
 
-    def __init__(self, agent_id, x, y, age=None, family_id=None):
+    __slots__ = ('population', 'index')
+
+    def __init__(self, agent_id, x, y, age=None, family_id=None, population=None):
         """Initialize CA agent at grid position (x, y)."""
-        self.id = agent_id
-        self.x = x
-        self.y = y
-        self.age = age if age else random.randint(5, 80)
-        self.family_id = family_id
+        if population is None:
+            population = AgentPopulation(capacity=1)
+        self.population = population
+        self.index = population.add(agent_id, x, y, age if age else int(_default_rng.integers(5, 81)), family_id)
+        population._attach(self)
+
+    @classmethod
+    def from_row(cls, population, index):
+        """Create a view of an existing population row without adding a new one."""
+        agent = cls.__new__(cls)
+        agent.population = population
+        agent.index = index
+        population._attach(agent)
+        return agent
+
+    id = _column_attribute('id', int)
+    x = _column_attribute('x', int)
+    y = _column_attribute('y', int)
+    age = _column_attribute('age', int)
+    panic_level = _column_attribute('panic', float)  # 0.0 to 1.0
+    stamina = _column_attribute('stamina', float)  # 0.0 to 1.0
+    last_move_successful = _column_attribute('last_move_successful', bool)
+    queued = _column_attribute('queued', bool)  # Waiting in an exit queue
+    base_speed = _column_attribute('base_speed', float)
+    resilience = _column_attribute('resilience', float)
+    priority_multiplier = _column_attribute('priority_multiplier', float)
+
+    @property
+    def evacuated(self):
+        """Has reached exit."""
+        return bool(self.population._columns['evacuated'][self.index])
+
+    @evacuated.setter
+    def evacuated(self, value):
+        self.population.set_evacuated(self.index, value)
 
-        # Age-based attributes
-        self._init_attributes_by_age()
+    @property
+    def family_id(self):
+        family_id = int(self.population._columns['family_id'][self.index])
+        return None if family_id == NO_FAMILY else family_id
 
-        # State
-        self.panic_level = 0.0  # 0.0 to 1.0
-        self.evacuated = False  # Has reached exit
-        self.stamina = 1.0  # 0.0 to 1.0
-        self.last_move_successful = True
+    @family_id.setter
+    def family_id(self, value):
+        self.population._columns['family_id'][self.index] = NO_FAMILY if value is None else value
 
     def _init_attributes_by_age(self):
         """Initialize attributes based on age."""
-        # Children (< 15): slower, more panic-prone
-        if self.age < 15:
-            self.base_speed = 0.7
-            self.resilience = 0.3
-            self.priority_multiplier = 1.5  # Higher priority in conflicts
-        # Elderly (> 65): slower, less resilient
-        elif self.age > 65:
-            self.base_speed = 0.6
-            self.resilience = 0.4
-            self.priority_multiplier = 1.3
-        # Young adults (20-40): faster, more resilient
-        elif 20 <= self.age <= 40:
-            self.base_speed = 1.0
-            self.resilience = 0.8
-            self.priority_multiplier = 1.0
-        # Others
-        else:
-            self.base_speed = 0.9
-            self.resilience = 0.6
-            self.priority_multiplier = 1.0
+        self.population.init_age_attributes(self.index)
 
     def update_panic(self, neighbors_panic, danger_proximity=0.0):
         """Update panic level based on surroundings and danger."""
@@ -1,5 +1,101 @@
 """Movement behaviors and conflict resolution for CA simulation."""
-import random
+import numpy as np
+
+from .ca_population import AgentPopulation
+
+# Fallback generator for callers that don't pass StepDraws
+_default_rng = np.random.default_rng()
+
+# Behaviour constants shared by the reference and vectorized engine modes
+CROWD_RADIUS = 3
+PANIC_RADIUS = 3
+HIGH_PANIC_THRESHOLD = 0.6
+RANDOM_CHOICE_PROB = 0.2
+HIGH_PANIC_RANDOM_CHOICE_PROB = 0.4
+TIEBREAK_SCALE = 0.1
+PANIC_DECAY_RATE = 0.01
+
+# Philox4x32-10 multipliers and key increments (Salmon et al., SC'11)
+PHILOX_MULTIPLIERS = (0xD2511F53, 0xCD9E8D57)
+PHILOX_KEY_INCREMENTS = (0x9E3779B9, 0xBB67AE85)
+PHILOX_ROUNDS = 10
+
+
+def live_agents(agents):
+    """Get the agents that have not evacuated yet.
+
+    For an AgentPopulation this reads the compacted active index instead
+    of testing every agent.
+    """
+    if isinstance(agents, AgentPopulation):
+        return agents.active_agents()
+    return [agent for agent in agents if not agent.evacuated]
+
+
+def philox4x32(counters, key):
+    """Philox4x32-10 counter-based generator, vectorized over counters.
+
+    Args:
+        counters: Four arrays of 32-bit counter words, one entry per block
+        key: Two 32-bit key words
+
+    Returns:
+        Four uint64 arrays holding each block's 32-bit output words
+    """
+    mask = np.uint64(0xFFFFFFFF)
+    m0, m1 = (np.uint64(m) for m in PHILOX_MULTIPLIERS)
+    c0, c1, c2, c3 = (np.asarray(c, dtype=np.uint64) & mask for c in counters)
+    k0, k1 = (int(k) & 0xFFFFFFFF for k in key)
+    for _ in range(PHILOX_ROUNDS):
+        p0 = c0 * m0  # 32 x 32 bit products fit in 64 bits
+        p1 = c2 * m1
+        c0, c1, c2, c3 = (p1 >> 32) ^ c1 ^ np.uint64(k0), p1 & mask, (p0 >> 32) ^ c3 ^ np.uint64(k1), p0 & mask
+        k0 = (k0 + PHILOX_KEY_INCREMENTS[0]) & 0xFFFFFFFF
+        k1 = (k1 + PHILOX_KEY_INCREMENTS[1]) & 0xFFFFFFFF
+    return c0, c1, c2, c3
+
+
+class StepDraws:
+    """Random numbers for one simulation step, one entry per population row.
+
+    Drawing every agent's numbers up front in one batch means the
+    per-agent reference loop and the vectorized engine consume exactly the
+    same random stream, so both modes give identical results for a seed.
+
+    from_counter draws instead derive each row's numbers from (key, step,
+    row) alone, so any subset of rows can be drawn without the others.
+    """
+
+    def __init__(self, rng, size):
+        """Draw exploration coins, neighbour picks and tiebreak jitter."""
+        self.explore, self.pick, self.jitter = rng.random((3, size))
+
+    @classmethod
+    def from_counter(cls, key, step, rows):
+        """Draws of the given rows from one Philox block per (step, row).
+
+        Args:
+            key: Two 32-bit key words (see CASimulation.use_counter_draws)
+            step: Simulation timestep
+            rows: Population rows, renumbered 0..len(rows)-1 in the result
+
+        Returns:
+            StepDraws aligned with rows
+        """
+        rows = np.asarray(rows, dtype=np.uint64)
+        w0, w1, w2, w3 = philox4x32((rows, rows >> np.uint64(32), np.full(rows.shape, step, dtype=np.uint64),
+                                     np.zeros(rows.shape, dtype=np.uint64)), key)
+        draws = cls.__new__(cls)
+        draws.explore = w0 * 2.0 ** -32
+        draws.pick = w1 * 2.0 ** -32
+        draws.jitter = ((w2 >> np.uint64(5)) * 2.0 ** 26 + (w3 >> np.uint64(6))) * 2.0 ** -53  # 53-bit, as numpy
+        return draws
+
+    def subset(self, rows):
+        """Get the draws of the given rows, renumbered 0..len(rows)-1."""
+        draws = StepDraws.__new__(StepDraws)
+        draws.explore, draws.pick, draws.jitter = self.explore[rows], self.pick[rows], self.jitter[rows]
+        return draws
 
 
 def calculate_cell_attractiveness(x, y, agent, environment, agents):
@@ -15,7 +111,7 @@ def calculate_cell_attractiveness(x, y, agent, environment, agents):
     exit_attraction = -exit_distance  # Negative: closer exits are more attractive
 
     # Crowding penalty: count nearby agents
-    crowd_count = environment.count_nearby_agents(x, y, radius=3)
+    crowd_count = environment.count_nearby_agents(x, y, radius=CROWD_RADIUS)
     crowding_penalty = -crowd_count * 2.0
 
     # Panic factor: high panic agents are less discriminating
@@ -25,7 +121,7 @@ def calculate_cell_attractiveness(x, y, agent, environment, agents):
     return attractiveness
 
 
-def select_next_cell(agent, environment, agents, grid):
+def select_next_cell(agent, environment, agents, grid, draws=None):
     """Select next cell for agent to move to.
 
     Strategy:
@@ -34,8 +130,15 @@ def select_next_cell(agent, environment, agents, grid):
     - 80% chance: pick best cell (greedy)
     - 20% chance: pick random cell (exploration)
     - If high panic (>0.6): 40% random choice instead
+
+    Random numbers come from draws (a StepDraws for the agent's
+    population) when given, otherwise from a module-level generator.
     """
     current_x, current_y = agent.x, agent.y
+    if agent.queued:
+        # Waiting at an exit: hold the cell until the door lets the agent out
+        return (current_x, current_y)
+
     neighbors = grid.get_neighbors_8(current_x, current_y)
 
     # Filter to walkable neighbors
@@ -58,22 +161,56 @@ def select_next_cell(agent, environment, agents, grid):
     attractiveness_scores.sort(reverse=True, key=lambda x: x[0])
 
     # Decision: greedy vs random
-    if agent.panic_level > 0.6:
+    if agent.panic_level > HIGH_PANIC_THRESHOLD:
         # High panic: 40% chance of random choice
-        random_choice_prob = 0.4
+        random_choice_prob = HIGH_PANIC_RANDOM_CHOICE_PROB
     else:
         # Normal: 20% chance of random choice
-        random_choice_prob = 0.2
+        random_choice_prob = RANDOM_CHOICE_PROB
 
-    if random.random() < random_choice_prob:
+    if draws is None:
+        explore_draw, pick_draw = _default_rng.random(2)
+    else:
+        explore_draw, pick_draw = draws.explore[agent.index], draws.pick[agent.index]
+
+    if explore_draw < random_choice_prob:
         # Random choice from walkable neighbors
-        return random.choice(walkable_neighbors)
+        pick = min(int(pick_draw * len(walkable_neighbors)), len(walkable_neighbors) - 1)
+        return walkable_neighbors[pick]
     else:
         # Greedy: pick best cell
         return attractiveness_scores[0][1]
 
 
-def resolve_conflicts(intention_map, agents, grid):
+def pick_conflict_winners(cells, priority, order):
+    """Pick one winning claim per target cell.
+
+    All claims are sorted once by (cell, priority descending, order), so
+    the first claim of each cell group is the winner. Cost is a single
+    lexsort, however many agents crowd the same cell.
+
+    Args:
+        cells: Flat target cell index per claim
+        priority: Priority per claim, tiebreak jitter included
+        order: Secondary key for exact ties (lower wins), e.g. population row
+
+    Returns:
+        Boolean array, True for the winning claim of each cell
+    """
+    if len(cells) == 0:
+        return np.zeros(0, dtype=bool)
+
+    ranking = np.lexsort((order, -priority, cells))
+    sorted_cells = cells[ranking]
+    first_in_cell = np.ones(len(ranking), dtype=bool)
+    first_in_cell[1:] = sorted_cells[1:] != sorted_cells[:-1]
+
+    winners = np.zeros(len(cells), dtype=bool)
+    winners[ranking[first_in_cell]] = True
+    return winners
+
+
+def resolve_conflicts(intention_map, agents, grid, draws=None):
     """Resolve conflicts when multiple agents want same cell.
 
     Conflict resolution by priority:
@@ -82,57 +219,55 @@ def resolve_conflicts(intention_map, agents, grid):
     3. High panic: +0.5 to priority
     4. Random tiebreaker
 
-    Only one agent per cell is allowed.
+    Only one agent per cell is allowed. Evacuated agents no longer hold a
+    cell and take no part; agents waiting in an exit queue always keep
+    their cell.
     """
-    # Group intentions by target cell
-    cell_to_agents = {}
-    for agent in agents:
-        target = intention_map.get(agent.id, (agent.x, agent.y))
-        if target not in cell_to_agents:
-            cell_to_agents[target] = []
-        cell_to_agents[target].append(agent)
-
-    # Resolve conflicts for cells with multiple agents
-    approved_moves = {}  # {agent_id: (new_x, new_y) or None}
-
-    for target_cell, candidates in cell_to_agents.items():
-        if len(candidates) == 1:
-            # No conflict
-            approved_moves[candidates[0].id] = target_cell
-        else:
-            # Conflict: apply priority rules
-            priority_scores = []
-            for agent in candidates:
-                priority = agent.get_priority()
-                # Add random component for tiebreaker
-                priority += random.random() * 0.1
-                priority_scores.append((priority, agent))
-
-            # Sort by priority (highest first)
-            priority_scores.sort(reverse=True, key=lambda x: x[0])
-
-            # Winner gets the cell
-            winner = priority_scores[0][1]
-            approved_moves[winner.id] = target_cell
+    claimants = live_agents(agents)
+    if not claimants:
+        return {}
+
+    # Encode every claim as a flat cell index (agents without an intention stay put)
+    targets = [intention_map.get(agent.id, (agent.x, agent.y)) for agent in claimants]
+    target_array = np.array(targets, dtype=np.int64)
+    cells = target_array[:, 0] * grid.height + target_array[:, 1]
+
+    priority = np.array([np.inf if agent.queued else agent.get_priority() for agent in claimants])
+    if draws is None:
+        jitter = _default_rng.random(len(claimants))
+    else:
+        jitter = draws.jitter[[agent.index for agent in claimants]]
+    winners = pick_conflict_winners(cells, priority + jitter * TIEBREAK_SCALE,
+                                    np.array([agent.index for agent in claimants]))
 
-            # Losers stay in place
-            for _, agent in priority_scores[1:]:
-                approved_moves[agent.id] = (agent.x, agent.y)
+    # Winner gets the cell, losers stay in place
+    approved_moves = {}  # {agent_id: (new_x, new_y)}
+    for agent, target, won in zip(claimants, targets, winners):
+        approved_moves[agent.id] = target if won else (agent.x, agent.y)
 
     return approved_moves
 
 
-def execute_moves(agents, approved_moves, grid, environment):
+def execute_moves(agents, approved_moves, grid, environment,
+                  panic_spread_rate=1.0, panic_decay_rate=PANIC_DECAY_RATE, exits=None):
     """Execute approved moves and update agent positions.
 
-    Updates panic and stamina after movement.
+    Updates panic and stamina after movement. Panic is updated
+    synchronously: every agent sees its neighbours' panic from before this
+    update, at their post-move positions. Neighbour panic is scaled by
+    panic_spread_rate, and panic_decay_rate is subtracted afterwards.
+
+    Agents reaching an exit evacuate at once, unless exits (ExitQueues
+    for the agents' population) has a capacity: then they join their
+    door's queue and leave as the door releases them.
     """
     evacuated_agents = []
+    on_grid_agents = []
+    exit_cells = []  # (x, y) of instant evacuations, for throughput counters
+    queue_arrivals = []
+    queueing = exits is not None and exits.limited
 
-    for agent in agents:
-        if agent.evacuated:
-            continue
-
+    for agent in live_agents(agents):
         if agent.id not in approved_moves:
             continue
 
@@ -140,10 +275,14 @@ def execute_moves(agents, approved_moves, grid, environment):
 
         # Check if reached exit
         if grid.get_cell_type(new_x, new_y) == 3:  # CELL_EXIT
-            agent.evacuated = True
-            grid.remove_agent(agent.id)
-            evacuated_agents.append(agent.id)
-            continue
+            if not queueing:
+                agent.evacuated = True
+                grid.remove_agent(agent.id)
+                evacuated_agents.append(agent.id)
+                exit_cells.append((new_x, new_y))
+                continue
+            if not agent.queued:
+                queue_arrivals.append(agent)
 
         # Move agent
         if new_x != agent.x or new_y != agent.y:
@@ -151,11 +290,30 @@ def execute_moves(agents, approved_moves, grid, environment):
             agent.move_to(new_x, new_y)
         else:
             agent.last_move_successful = False
+        on_grid_agents.append(agent)
+
+    if exits is not None and exit_cells:
+        exit_x, exit_y = zip(*exit_cells)
+        exits.count_evacuated(exit_x, exit_y, grid.height)
+
+    if queueing:
+        # New arrivals join the back of their door queues, then doors release
+        if queue_arrivals:
+            rows = np.array([agent.index for agent in queue_arrivals])
+            exits.enqueue(rows, exits.doors_at(agents.x[rows], agents.y[rows], grid.height), agents)
+        for row in exits.release(agents, grid.height).tolist():
+            agent = agents[row]
+            agent.evacuated = True
+            grid.remove_agent(agent.id)
+            evacuated_agents.append(agent.id)
+        on_grid_agents = [agent for agent in on_grid_agents if not agent.evacuated]
 
-        # Update panic based on nearby agents
-        nearby_panic = environment.get_avg_panic_nearby(agent.x, agent.y, agents)
-        agent.update_panic(nearby_panic)
-        agent.decay_panic(rate=0.01)
+    # Update panic based on nearby agents (one field for the whole crowd)
+    if on_grid_agents:
+        panic_field = environment.get_panic_average_field(agents, radius=PANIC_RADIUS)
+        for agent in on_grid_agents:
+            agent.update_panic(panic_field[agent.x, agent.y] * panic_spread_rate)
+            agent.decay_panic(rate=panic_decay_rate)
 
     return evacuated_agents
 
@@ -171,6 +329,19 @@ def get_movement_statistics(agents):
             'avg_stamina': 1.0,
         }
 
+    if isinstance(agents, AgentPopulation):
+        # Column path: no per-agent Python objects touched
+        active = agents.active_rows
+        panic = agents.panic[active]
+        stamina = agents.stamina[active]
+        return {
+            'avg_panic': float(panic.mean()) if panic.size else 0.0,
+            'max_panic': float(panic.max()) if panic.size else 0.0,
+            'evacuated_count': len(agents) - panic.size,
+            'total_count': int(panic.size),
+            'avg_stamina': float(stamina.mean()) if stamina.size else 1.0,
+        }
+
     active_agents = [a for a in agents if not a.evacuated]
     total_agents = len([a for a in agents if not a.evacuated])
 
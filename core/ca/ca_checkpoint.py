@@ -0,0 +1,160 @@
+"""Binary checkpoint/restore and mid-run scenario forking for CASimulation."""
+import json
+
+import numpy as np
+
+from .ca_agent import CAAgent
+from .ca_population import AgentPopulation, COLUMNS
+from .ca_engine import CASimulation
+
+CHECKPOINT_VERSION = 1
+
+# Key prefixes for per-agent columns and history series in the state dict
+_AGENT_PREFIX = 'agent_'
+_HISTORY_PREFIX = 'history_'
+
+
+def get_simulation_state(sim):
+    """Capture the full state of a simulation as a flat dict of arrays.
+
+    Covers grid layers, occupancy, agent columns with the active index,
+    exit queues, random generator state, history and timestep. Derived caches
+    (distance and density fields) are not stored; they are rebuilt on
+    demand after a restore.
+
+    Returns:
+        {name: np.ndarray}, ready for np.savez_compressed
+    """
+    meta = {
+        'version': CHECKPOINT_VERSION,
+        'width': sim.width,
+        'height': sim.height,
+        'max_timesteps': sim.max_timesteps,
+        'mode': sim.mode,
+        'panic_spread_rate': sim.panic_spread_rate,
+        'panic_decay_rate': sim.panic_decay_rate,
+        'exit_capacity': sim.exit_queues.capacity,
+        'timestep': sim.timestep,
+        'rng_state': sim.rng.bit_generator.state,
+        'draw_key': sim.draw_key,
+    }
+
+    sim.exit_queues.sync(sim.grid, sim.agents)
+    positions = sim.grid.agent_positions
+    state = {
+        'meta': np.array(json.dumps(meta)),
+        'static_layer': sim.grid.static_layer.copy(),
+        'dynamic_layer': sim.grid.dynamic_layer.copy(),
+        'position_ids': np.array(list(positions.keys()), dtype=np.int64),
+        'position_xy': np.array(list(positions.values()), dtype=np.int64).reshape(-1, 2),
+        'evacuated_ids': np.array(sim.evacuated_agents, dtype=np.int64),
+        'exit_queue_rows': sim.exit_queues.queued_rows(),
+        'exit_cell_throughput': sim.exit_queues.cell_throughput.copy(),
+    }
+    for name, values in sim.agents.get_state().items():
+        state[_AGENT_PREFIX + name] = values
+    for name, values in sim.history.items():
+        state[_HISTORY_PREFIX + name] = np.array(values)
+    return state
+
+
+def restore_simulation_state(state, mode=None):
+    """Build a new simulation from get_simulation_state output.
+
+    Args:
+        state: Dict (or loaded NpzFile) from get_simulation_state
+        mode: Engine mode for the restored run (default: the saved mode)
+
+    Returns:
+        CASimulation that continues exactly where the saved one was
+    """
+    meta = json.loads(str(state['meta']))
+    if meta['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {meta['version']}, expected {CHECKPOINT_VERSION}")
+
+    sim = CASimulation(meta['width'], meta['height'], max_timesteps=meta['max_timesteps'],
+                       mode=mode or meta['mode'], panic_spread_rate=meta['panic_spread_rate'],
+                       panic_decay_rate=meta['panic_decay_rate'], exit_capacity=meta['exit_capacity'])
+    sim.rng.bit_generator.state = meta['rng_state']
+    if meta.get('draw_key') is not None:
+        sim.use_counter_draws(meta['draw_key'])
+    sim.timestep = meta['timestep']
+
+    # Grid
+    sim.grid.load_static_layer(state['static_layer'])
+    sim.grid.dynamic_layer[:] = state['dynamic_layer']
+    sim.grid.agent_positions = {
+        agent_id: (x, y) for agent_id, (x, y) in zip(state['position_ids'].tolist(), state['position_xy'].tolist())
+    }
+    sim.grid.occupancy_version += 1
+
+    # Agents: columns first, then one CAAgent view per row
+    population = AgentPopulation.from_state({
+        name: state[_AGENT_PREFIX + name] for name in [*COLUMNS, 'active_rows', 'evacuation_order']
+    })
+    for row in range(len(population)):
+        CAAgent.from_row(population, row)
+    sim.agents = population
+    sim.evacuated_agents = state['evacuated_ids'].tolist()
+
+    # Exit queues: doors from the layout, then waiting agents in FIFO order
+    exits = sim.exit_queues
+    exits.sync(sim.grid, population)
+    exits.cell_throughput[:] = state['exit_cell_throughput']
+    waiting = state['exit_queue_rows']
+    exits.enqueue(waiting, exits.doors_at(population.x[waiting], population.y[waiting], sim.height), population)
+
+    sim.history = {name: state[_HISTORY_PREFIX + name].tolist() for name in sim.history}
+    return sim
+
+
+def save_checkpoint(sim, filepath):
+    """Write a compressed binary checkpoint (.npz) of a running simulation.
+
+    Loggers attached to the run are not part of the checkpoint.
+    """
+    np.savez_compressed(filepath, **get_simulation_state(sim))
+
+
+def load_checkpoint(filepath, mode=None):
+    """Restore a simulation saved with save_checkpoint.
+
+    Args:
+        filepath: Path of the .npz checkpoint
+        mode: Engine mode for the restored run (default: the saved mode)
+
+    Returns:
+        CASimulation ready to continue with step() or run()
+    """
+    with np.load(filepath, allow_pickle=False) as data:
+        return restore_simulation_state(data, mode)
+
+
+def fork_simulation(sim, scenarios):
+    """Fork independent copies of a simulation, one per scenario.
+
+    Every fork starts from the same state and the same random stream,
+    so differences between forks come from the scenario change rather
+    than from chance. The original simulation is left untouched.
+
+    Args:
+        sim: Simulation to fork (e.g. fresh from load_checkpoint)
+        scenarios: {name: function(sim) modifying the fork, or None to keep it unchanged}
+
+    Returns:
+        {name: CASimulation}
+
+    Example:
+        forks = fork_simulation(sim, {
+            'baseline': None,
+            'exit_2_blocked': lambda s: s.environment.block_exit(*s.environment.exits[2]),
+        })
+    """
+    state = get_simulation_state(sim)
+    forks = {}
+    for name, modify in scenarios.items():
+        fork = restore_simulation_state(state)
+        if modify is not None:
+            modify(fork)
+        forks[name] = fork
+    return forks
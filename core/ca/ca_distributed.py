@@ -0,0 +1,396 @@
+"""Domain-decomposed CA simulation: grid tiles stepped by worker processes.
+
+The grid is cut into strips of columns (tiles), each owned by one worker
+process. Every worker keeps a full copy of the agents it owns plus ghost
+copies of the agents in a halo of HALO_WIDTH columns on either side, and
+runs the ordinary vectorized step stages on that sub-grid. After each
+step, agents near a border are sent through the coordinator: to the
+tile they now stand in (migration) and to the tiles whose halo they are
+in (halo exchange).
+
+The halo is wider than one cell so that a single exchange per step is
+enough. Within one step an agent's result depends on agents up to
+HALO_WIDTH columns away: panic spread (PANIC_RADIUS) around where the
+agent and its neighbours moved (1 + 1 cells), the other claimants of
+those cells (2 cells), and the crowd density (CROWD_RADIUS) around their
+candidate cells (1 cell). Ghosts near a border are therefore stepped
+redundantly by both tiles from identical inputs, so claims on a border
+cell are resolved the same way on both sides.
+
+The simulation is switched to counter-based draws (see
+CASimulation.use_counter_draws): an agent's random numbers depend only on
+the key, the step and its population row, so each tile draws just the
+rows it holds. As the panic field sums each cell in value order, not
+storage order, a tiled run reproduces the single-process vectorized run
+agent for agent.
+"""
+import multiprocessing
+import traceback
+
+import numpy as np
+
+from .ca_population import COLUMNS
+from .ca_behaviors import StepDraws, CROWD_RADIUS, PANIC_RADIUS
+from .ca_engine import CASimulation
+
+HALO_WIDTH = 5 + PANIC_RADIUS + CROWD_RADIUS  # Ghost columns on each side of a tile
+
+# Agent state exchanged between processes: population columns plus the agent's
+# global population row
+STATE_COLUMNS = {'row': np.int64, **COLUMNS}
+
+
+def _take(agents, index):
+    """Select agents by mask or index."""
+    return {name: values[index] for name, values in agents.items()}
+
+
+def _concat(parts):
+    """Concatenate agent states."""
+    return {name: np.concatenate([part[name] for part in parts]) for name in STATE_COLUMNS}
+
+
+class _Tile:
+    """One tile's share of the simulation, living in a worker process.
+
+    The tile keeps one AgentPopulation across steps, holding its owned
+    agents and its ghosts. Each step only the agents that crossed a border
+    are written into it (put) or dropped from it (release), and rows freed
+    by departures and evacuations are reused, so the cost of a step follows
+    the tile's own agents rather than the whole population.
+    """
+
+    def __init__(self, init):
+        """Set up the tile's sub-grid from the coordinator's init message."""
+        self.x0, self.x1 = init['bounds']  # Owned columns, global coordinates
+        self.offset = init['offset']  # Global x of the sub-grid's column 0
+        self.draw_key = init['draw_key']
+
+        static_layer = init['static_layer']
+        self.sim = CASimulation(static_layer.shape[0], static_layer.shape[1], mode='vectorized',
+                                panic_spread_rate=init['panic_spread_rate'],
+                                panic_decay_rate=init['panic_decay_rate'])
+        self.sim.timestep = init['timestep']
+        self.sim.grid.load_static_layer(static_layer)
+        self.sim.environment.set_exit_distance_field(init['exit_field'])
+        self.sim.exit_queues.sync(self.sim.grid, self.sim.agents)
+
+        # Local row of each global population row (-1: not on this tile), and back
+        self._local = np.full(init['total_rows'], -1, dtype=np.int64)
+        self._global = np.zeros(64, dtype=np.int64)
+        self._owned = np.zeros(64, dtype=bool)  # Per local row: owned, not a ghost
+        self._free = []  # Local rows to reuse
+
+    def step(self, incoming):
+        """Step owned agents and their ghosts once.
+
+        Args:
+            incoming: {'owned': agents migrating in, 'halo': ghost agents}
+
+        Returns:
+            Dict with this tile's evacuations, outgoing border agents and statistics
+        """
+        self._receive(incoming)
+        population = self.sim.agents
+
+        draws = StepDraws.from_counter(self.draw_key, self.sim.timestep, self._global[:population.size])
+        before = population.active_rows.copy()
+        self.sim._step_vectorized(draws)
+        self.sim.timestep += 1
+
+        # Evacuated rows leave the tile; their grid entries are already removed
+        evacuated = np.array(population.evacuation_order, dtype=np.int64)
+        population.evacuation_order = []
+        evacuated_state = self._state(evacuated[self._owned[evacuated]])
+        self._drop(evacuated)
+
+        alive = before[self._owned[before] & ~population.evacuated[before]]
+        x = population.x[alive] + self.offset
+
+        # Agents that left the tile, or that neighbours need as ghosts
+        outgoing = alive[(x < self.x0 + HALO_WIDTH) | (x >= self.x1 - HALO_WIDTH)]
+        self._owned[alive[(x < self.x0) | (x >= self.x1)]] = False
+
+        panic = population.panic[alive]
+        return {
+            'evacuated': evacuated_state,
+            'outgoing': self._state(outgoing),
+            'active_count': int(panic.size),
+            'panic_sum': float(panic.sum()),
+            'panic_max': float(panic.max()) if panic.size else 0.0,
+            'stamina_sum': float(population.stamina[alive].sum()),
+        }
+
+    def owned_state(self):
+        """State of the agents this tile owns (global coordinates)."""
+        active = self.sim.agents.active_rows
+        return self._state(active[self._owned[active]])
+
+    def _receive(self, incoming):
+        """Write migrants and fresh ghosts into the population, dropping stale ghosts."""
+        population = self.sim.agents
+        grid = self.sim.grid
+        arrivals = _concat([incoming['owned'], incoming['halo']])
+        owned = np.arange(len(arrivals['row'])) < len(incoming['owned']['row'])
+
+        # Last step's ghosts (including agents that moved off the tile) are
+        # replaced by the coordinator's copies; those not resent are gone
+        rows = self._local[arrivals['row']]
+        resent = np.zeros(population.size, dtype=bool)
+        resent[rows[rows >= 0]] = True
+        active = population.active_rows
+        stale = active[~self._owned[active] & ~resent[active]]
+        for agent_id in population.id[stale].tolist():
+            grid.remove_agent(agent_id)
+        population.release(stale)
+        self._drop(stale)
+
+        # New agents take freed rows first, then rows past the end
+        new = rows < 0
+        count = int(new.sum())
+        reused = min(count, len(self._free))
+        rows[new] = np.concatenate([np.array(self._free[len(self._free) - reused:], dtype=np.int64),
+                                    np.arange(population.size, population.size + count - reused)])
+        del self._free[len(self._free) - reused:]
+        if len(rows) and rows.max() >= len(self._global):
+            capacity = max(2 * len(self._global), int(rows.max()) + 1)
+            self._global = np.resize(self._global, capacity)
+            self._owned = np.concatenate([self._owned, np.zeros(capacity - len(self._owned), dtype=bool)])
+        self._local[arrivals['row']] = rows
+        self._global[rows] = arrivals['row']
+        self._owned[rows] = owned
+
+        state = {name: arrivals[name] for name in COLUMNS}
+        state['x'] = arrivals['x'] - self.offset
+        population.put(rows, state)
+        for agent_id, x, y in zip(state['id'].tolist(), state['x'].tolist(), state['y'].tolist()):
+            grid.place_agent(agent_id, x, y)
+
+    def _drop(self, rows):
+        """Forget local rows that no longer hold an agent of this tile."""
+        self._local[self._global[rows]] = -1
+        self._owned[rows] = False
+        self._free.extend(rows.tolist())
+
+    def _state(self, rows):
+        """Agent state of local rows, in global coordinates."""
+        population = self.sim.agents
+        state = {name: population.column(name)[rows] for name in COLUMNS}
+        state['row'] = self._global[rows]
+        state['x'] = state['x'] + self.offset
+        return state
+
+
+def _run_tile(conn):
+    """Worker process loop: answer the coordinator's commands until 'close'."""
+    tile = None
+    while True:
+        command, payload = conn.recv()
+        try:
+            if command == 'init':
+                tile = _Tile(payload)
+                result = None
+            elif command == 'step':
+                result = tile.step(payload)
+            elif command == 'gather':
+                result = tile.owned_state()
+            else:
+                break
+        except Exception:
+            conn.send(('error', traceback.format_exc()))
+            continue
+        conn.send(('ok', result))
+    conn.close()
+
+
+class DistributedSimulation:
+    """A CASimulation stepped tile by tile across worker processes.
+
+    Built from a prepared simulation (layout and agents loaded, e.g. from
+    CASimulation.from_config or CALayout.create_simulation), which it
+    continues from its current timestep. Agent states match the same
+    simulation stepped in 'vectorized' mode; only float sums in history
+    and the order of agents evacuating in the same step may differ.
+
+    Exit capacities (queues) are not supported: a door can span tiles.
+
+    Use as a context manager, or call close(), to stop the workers.
+    """
+
+    def __init__(self, sim, tiles=2):
+        """Split sim into tiles and start one worker process per tile.
+
+        Args:
+            sim: CASimulation to continue. It is switched to counter-based
+                draws if it does not use them yet; its agents are left unchanged
+            tiles: Number of column strips / worker processes
+        """
+        if sim.exit_queues.limited:
+            raise ValueError("Distributed simulation does not support exit capacity")
+        if not 1 <= tiles <= sim.width:
+            raise ValueError(f"tiles must be between 1 and the grid width ({sim.width}), got {tiles}")
+        if sim.draw_key is None:
+            sim.use_counter_draws()
+
+        self.width = sim.width
+        self.height = sim.height
+        self.max_timesteps = sim.max_timesteps
+        self.timestep = sim.timestep
+        self.evacuated_agents = list(sim.evacuated_agents)
+        self.history = {key: list(values) for key, values in sim.history.items()}
+
+        edges = np.linspace(0, sim.width, tiles + 1).astype(int).tolist()
+        self.tile_bounds = list(zip(edges[:-1], edges[1:]))
+
+        state = sim.agents.get_state()
+        self.total_rows = len(state['id'])
+        active = np.sort(state['active_rows'])
+        done = np.flatnonzero(state['evacuated'])
+        agents = {name: state[name][active] for name in COLUMNS}
+        agents['row'] = active
+        self._evacuated = [{**{name: state[name][done] for name in COLUMNS}, 'row': done}]
+        self.active_count = len(active)
+
+        static_layer = sim.grid.static_layer
+        exit_field = sim.environment.get_exit_distance_field()
+        context = multiprocessing.get_context()
+        self._connections = []
+        self._workers = []
+        for x0, x1 in self.tile_bounds:
+            left, right = max(0, x0 - HALO_WIDTH), min(sim.width, x1 + HALO_WIDTH)
+            parent, child = context.Pipe()
+            worker = context.Process(target=_run_tile, args=(child,), daemon=True)
+            worker.start()
+            child.close()
+            self._connections.append(parent)
+            self._workers.append(worker)
+            parent.send(('init', {
+                'bounds': (x0, x1),
+                'offset': left,
+                'total_rows': self.total_rows,
+                'timestep': sim.timestep,
+                'draw_key': sim.draw_key,
+                'static_layer': static_layer[left:right],
+                'exit_field': exit_field[left:right],
+                'panic_spread_rate': sim.panic_spread_rate,
+                'panic_decay_rate': sim.panic_decay_rate,
+            }))
+        self._receive_all()
+
+        # Agents waiting to be delivered to each tile at its next step
+        self._pending = self._route(agents, np.full(len(active), -1))
+
+    def step(self):
+        """Execute one simulation step on all tiles.
+
+        Returns:
+            False if max_timesteps was already reached
+        """
+        if self.timestep >= self.max_timesteps:
+            return False
+
+        for conn, incoming in zip(self._connections, self._pending):
+            conn.send(('step', incoming))
+        results = self._receive_all()
+
+        for result in results:
+            self._evacuated.append(result['evacuated'])
+            self.evacuated_agents.extend(result['evacuated']['id'].tolist())
+
+        outgoing = _concat([result['outgoing'] for result in results])
+        source = np.repeat(np.arange(len(results)), [len(result['outgoing']['row']) for result in results])
+        self._pending = self._route(outgoing, source)
+
+        # Statistics, as in CASimulation._update_statistics
+        self.active_count = sum(result['active_count'] for result in results)
+        count = self.active_count
+        self.history['timesteps'].append(self.timestep)
+        self.history['active_agents'].append(count)
+        self.history['evacuated_agents'].append(len(self.evacuated_agents))
+        self.history['avg_panic'].append(sum(r['panic_sum'] for r in results) / count if count else 0.0)
+        self.history['max_panic'].append(max(r['panic_max'] for r in results) if count else 0.0)
+        self.history['avg_stamina'].append(sum(r['stamina_sum'] for r in results) / count if count else 1.0)
+
+        self.timestep += 1
+        return True
+
+    def run(self):
+        """Run until all agents evacuated or max steps reached.
+
+        Returns:
+            Number of steps executed
+        """
+        start = self.timestep
+        while self.active_count > 0 and self.step():
+            pass
+        return self.timestep - start
+
+    def get_agent_state(self):
+        """Gather every agent's current state from the tiles.
+
+        Returns:
+            Dict of population columns (global coordinates), indexed by
+            the original population row
+        """
+        for conn in self._connections:
+            conn.send(('gather', None))
+        parts = self._receive_all() + [pending['owned'] for pending in self._pending] + self._evacuated
+        agents = _concat(parts)
+        order = np.argsort(agents['row'])
+        return {name: agents[name][order] for name in COLUMNS}
+
+    def get_statistics(self):
+        """Get current simulation statistics."""
+        return {
+            'timestep': self.timestep,
+            'active_agents': self.active_count,
+            'evacuated_agents': len(self.evacuated_agents),
+            'avg_panic': self.history['avg_panic'][-1] if self.history['avg_panic'] else 0.0,
+            'max_panic': self.history['max_panic'][-1] if self.history['max_panic'] else 0.0,
+            'avg_stamina': self.history['avg_stamina'][-1] if self.history['avg_stamina'] else 1.0,
+            'queued_agents': 0,
+        }
+
+    def close(self):
+        """Stop the worker processes."""
+        for conn in self._connections:
+            conn.send(('close', None))
+            conn.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections = []
+        self._workers = []
+
+    def _route(self, agents, source):
+        """Split border agents into each tile's migrants and ghosts.
+
+        Args:
+            agents: Agent state after a step (global coordinates)
+            source: Tile each agent was stepped by (-1 for none)
+
+        Returns:
+            Per tile {'owned': agents now in the tile, 'halo': ghosts for the tile}
+        """
+        x = agents['x']
+        pending = []
+        for tile, (x0, x1) in enumerate(self.tile_bounds):
+            owned = (x >= x0) & (x < x1) & (source != tile)
+            halo = ((x >= x0 - HALO_WIDTH) & (x < x0)) | ((x >= x1) & (x < x1 + HALO_WIDTH))
+            pending.append({'owned': _take(agents, owned), 'halo': _take(agents, halo)})
+        return pending
+
+    def _receive_all(self):
+        """Collect one reply from every worker, raising if any failed."""
+        results = []
+        for conn in self._connections:
+            status, result = conn.recv()
+            if status == 'error':
+                raise RuntimeError(f"Tile worker failed:\n{result}")
+            results.append(result)
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
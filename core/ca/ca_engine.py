@@ -1,33 +1,66 @@
 """Main cellular automaton simulation engine."""
-from .ca_grid import CAGrid
+import numpy as np
+
+from .ca_grid import CAGrid, CELL_WALL
 from .ca_agent import CAAgent
+from .ca_population import AgentPopulation
 from .ca_environment import CAEnvironment
-from .ca_behaviors import select_next_cell, resolve_conflicts, execute_moves, get_movement_statistics
+from .ca_exits import ExitQueues
+from .ca_behaviors import (
+    StepDraws, select_next_cell, resolve_conflicts, execute_moves, get_movement_statistics, PANIC_DECAY_RATE
+)
+from . import ca_vectorized, ca_kernels
+
+# Engine modes: per-agent Python loop, or batched NumPy over all agents
+MODES = ('reference', 'vectorized')
 
 
 class CASimulation:
     """Cellular automaton based evacuation simulation."""
 
-    def __init__(self, width=100, height=100, max_timesteps=1000):
+    def __init__(self, width=100, height=100, max_timesteps=1000, mode='reference', seed=None,
+                 panic_spread_rate=1.0, panic_decay_rate=PANIC_DECAY_RATE, exit_capacity=None,
+                 backend='auto'):
         """Initialize CA simulation.
 
         Args:
             width: Grid width (default 100)
             height: Grid height (default 100)
             max_timesteps: Maximum simulation steps (default 1000)
+            mode: 'reference' (per-agent loop) or 'vectorized' (batched NumPy);
+                both give identical results for the same seed
+            seed: Seed for the simulation's random generator (default: fresh entropy)
+            panic_spread_rate: Scale of panic picked up from nearby agents per step
+            panic_decay_rate: Panic lost per step
+            exit_capacity: Agents per step each door (connected group of exit
+                cells) lets out; None evacuates agents the moment they reach an exit
+            backend: Kernels for the vectorized mode: 'numpy', 'numba' (JIT
+                compiled per-agent loops) or 'auto' (numba if installed);
+                all give identical results
         """
+        if mode not in MODES:
+            raise ValueError(f"Unknown engine mode '{mode}', expected one of {MODES}")
+        self.backend = ca_kernels.resolve_backend(backend)
+        self._kernels = ca_kernels if self.backend == 'numba' else ca_vectorized
+
         self.width = width
         self.height = height
         self.max_timesteps = max_timesteps
+        self.mode = mode
+        self.panic_spread_rate = panic_spread_rate
+        self.panic_decay_rate = panic_decay_rate
+        self.rng = np.random.default_rng(seed)
+        self.draw_key = None  # Philox key once use_counter_draws is on
         self.timestep = 0
 
         # Initialize grid and environment
         self.grid = CAGrid(width, height)
         self.environment = CAEnvironment(self.grid)
 
-        # Agent tracking
-        self.agents = []
+        # Agent tracking: array-backed population, iterable as CAAgent views
+        self.agents = AgentPopulation()
         self.evacuated_agents = []
+        self.exit_queues = ExitQueues(exit_capacity)
 
         # Statistics
         self.history = {
@@ -39,38 +72,102 @@ class CASimulation:
             'avg_stamina': [],
         }
 
+    @classmethod
+    def from_config(cls, config, mode='reference', seed=None, max_timesteps=None, backend='auto'):
+        """Build a simulation from a parsed configuration.
+
+        Args:
+            config: Dict as returned by parse_excel_config
+            mode: Engine mode, see CASimulation
+            seed: Seed for the simulation's random generator
+                (default: params['random_seed'] from the config)
+            max_timesteps: Override for params['simulation_steps']
+            backend: Kernel backend, see CASimulation
+
+        Returns:
+            CASimulation with layout and agents loaded
+        """
+        params = config['params']
+        if max_timesteps is None:
+            max_timesteps = params['simulation_steps']
+        if seed is None:
+            seed = params.get('random_seed')
+
+        sim = cls(config['width'], config['height'], max_timesteps=max_timesteps, mode=mode, seed=seed,
+                  panic_spread_rate=params['panic_spread_rate'], panic_decay_rate=params['panic_decay_rate'],
+                  exit_capacity=params.get('exit_capacity'), backend=backend)
+        sim.grid.load_static_layer(np.asarray(config['grid_data'], dtype=np.uint8))
+        sim.place_agents(config['agents'], params['initial_population'])
+        return sim
+
+    def place_agents(self, agent_specs, count):
+        """Place agents from config specs, or count random agents if there are none.
+
+        Args:
+            agent_specs: List of {'id', 'x', 'y', 'age', 'family_id'} dicts (may be empty)
+            count: Number of random agents to place when agent_specs is empty
+        """
+        if agent_specs:
+            for agent_data in agent_specs:
+                self.add_agent(
+                    agent_data['id'],
+                    agent_data['x'],
+                    agent_data['y'],
+                    agent_data.get('age'),
+                    agent_data.get('family_id')
+                )
+        else:
+            self.add_agents_random(count)
+
     def add_agent(self, agent_id, x, y, age=None, family_id=None):
-        """Add agent to simulation at initial position."""
+        """Add agent to simulation at initial position (random age if not given)."""
         if not self.grid.is_walkable(x, y):
             return False
 
-        agent = CAAgent(agent_id, x, y, age, family_id)
-        self.agents.append(agent)
+        if not age:
+            age = int(self.rng.integers(5, 81))
+        CAAgent(agent_id, x, y, age, family_id, population=self.agents)
         self.grid.place_agent(agent_id, x, y)
         return True
 
     def add_agents_random(self, count):
-        """Add random agents at random walkable positions."""
-        import random
-        import numpy as np
+        """Add random agents at distinct random free walkable positions.
+
+        Positions, ages and family ids are drawn in one batch each from the
+        simulation's random generator.
+
+        Returns:
+            Number of agents placed (less than count only if free cells run out)
+        """
+        free = (self.grid.static_layer != CELL_WALL) & (self.grid.get_occupancy_counts() == 0)
+        free_cells = np.flatnonzero(free)
+        families = count // 5 + 1
+        count = min(count, free_cells.size)
 
-        placed = 0
-        attempts = 0
-        max_attempts = count * 10
+        cells = self.rng.choice(free_cells, size=count, replace=False)
+        ages = self.rng.integers(5, 81, size=count)
+        family_ids = self.rng.integers(0, families, size=count)
 
-        while placed < count and attempts < max_attempts:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
+        for agent_id, (cell, age, family_id) in enumerate(zip(cells.tolist(), ages.tolist(), family_ids.tolist())):
+            x, y = divmod(cell, self.height)
+            self.add_agent(agent_id, x, y, age, family_id)
 
-            if self.grid.is_walkable(x, y) and not self.grid.is_occupied(x, y):
-                age = random.randint(5, 80)
-                family_id = random.randint(0, count // 5)
-                self.add_agent(placed, x, y, age, family_id)
-                placed += 1
+        return count
 
-            attempts += 1
+    def use_counter_draws(self, key=None):
+        """Derive each step's random numbers from (key, timestep, row) from now on.
 
-        return placed
+        Instead of one batch from the shared generator per step, every row
+        gets its own counter-based draws (StepDraws.from_counter), so a
+        subset of rows can be drawn on its own, e.g. by the tiles of a
+        DistributedSimulation, and still match this simulation.
+
+        Args:
+            key: Two 32-bit words (default: drawn from the simulation's generator)
+        """
+        if key is None:
+            key = self.rng.integers(0, 2 ** 32, size=2, dtype=np.uint64)
+        self.draw_key = tuple(int(word) for word in key)
 
     def step(self):
         """Execute one simulation step.
@@ -83,39 +180,68 @@ class CASimulation:
         if self.timestep >= self.max_timesteps:
             return False
 
-        # Load exits/entrances from grid
-        self.environment.load_from_grid()
+        # All random numbers for this step, one batch per population row
+        if self.draw_key is None:
+            draws = StepDraws(self.rng, len(self.agents))
+        else:
+            draws = StepDraws.from_counter(self.draw_key, self.timestep, np.arange(len(self.agents)))
+        self.exit_queues.sync(self.grid, self.agents)
+
+        if self.mode == 'vectorized':
+            newly_evacuated = self._step_vectorized(draws)
+        else:
+            newly_evacuated = self._step_reference(draws)
+        self.evacuated_agents.extend(newly_evacuated)
 
+        # Update statistics
+        self._update_statistics()
+
+        self.timestep += 1
+        return True
+
+    def _step_reference(self, draws):
+        """Run the three stages with the per-agent reference functions."""
         # Stage 1: Intention registration
         intention_map = {}  # {agent_id: (x, y)}
-        for agent in self.agents:
-            if agent.evacuated:
-                continue
-
+        for agent in self.agents.active_agents():
             # Select next cell based on 8-neighborhood
-            next_cell = select_next_cell(agent, self.environment, self.agents, self.grid)
+            next_cell = select_next_cell(agent, self.environment, self.agents, self.grid, draws)
             intention_map[agent.id] = next_cell
 
         # Stage 2: Conflict resolution
-        approved_moves = resolve_conflicts(intention_map, self.agents, self.grid)
+        approved_moves = resolve_conflicts(intention_map, self.agents, self.grid, draws)
 
         # Stage 3: Execution
-        newly_evacuated = execute_moves(self.agents, approved_moves, self.grid, self.environment)
-        self.evacuated_agents.extend(newly_evacuated)
+        return execute_moves(self.agents, approved_moves, self.grid, self.environment,
+                             self.panic_spread_rate, self.panic_decay_rate, self.exit_queues)
 
-        # Update statistics
-        self._update_statistics()
+    def _step_vectorized(self, draws):
+        """Run the three stages over all agents at once, with the backend's kernels."""
+        population = self.agents
+        kernels = self._kernels
+        active_rows = population.active_rows.copy()  # Evacuations reorder the live index
 
-        self.timestep += 1
-        return True
+        # Stage 1: Intention registration
+        target_x, target_y = kernels.select_next_cells(
+            active_rows, population, self.environment, self.grid, draws)
+
+        # Stage 2: Conflict resolution
+        winners = kernels.resolve_conflicts(
+            active_rows, target_x, target_y, population, self.grid, draws)
+        new_x = np.where(winners, target_x, population.x[active_rows])
+        new_y = np.where(winners, target_y, population.y[active_rows])
+
+        # Stage 3: Execution
+        return ca_vectorized.execute_moves(active_rows, new_x, new_y, population, self.grid, self.environment,
+                                           self.panic_spread_rate, self.panic_decay_rate, self.exit_queues,
+                                           kernels.update_panic)
 
     def _update_statistics(self):
         """Update simulation statistics."""
-        active = [a for a in self.agents if not a.evacuated]
         stats = get_movement_statistics(self.agents)
 
         self.history['timesteps'].append(self.timestep)
-        self.history['active_agents'].append(len(active))
+        self.history['active_agents'].append(stats['total_count'])
         self.history['evacuated_agents'].append(len(self.evacuated_agents))
         self.history['avg_panic'].append(stats['avg_panic'])
         self.history['max_panic'].append(stats['max_panic'])
@@ -125,14 +251,20 @@ class CASimulation:
         """Run complete simulation until all evacuated or max steps reached.
 
         Args:
-            logger: Optional CALogger to record each step
+            logger: Optional CALogger to record each step, or a list of loggers
+                (e.g. a CALogger and a StreamingExcelWriter)
 
         Returns:
             Number of steps executed
         """
+        if logger is None:
+            loggers = []
+        else:
+            loggers = list(logger) if isinstance(logger, (list, tuple)) else [logger]
+
         while self.timestep < self.max_timesteps:
             # Check if all evacuated
-            if len(self.evacuated_agents) == len(self.agents):
+            if self.agents.active_count == 0:
                 print(f"All agents evacuated at timestep {self.timestep}")
                 break
 
@@ -140,34 +272,78 @@ class CASimulation:
             self.step()
 
             # Log if provided
-            if logger:
-                logger.log_step(
-                    self.timestep,
-                    self.agents,
-                    self.grid,
-                    self.get_statistics()
-                )
+            if loggers:
+                statistics = self.get_statistics()
+                for step_logger in loggers:
+                    step_logger.log_step(self.timestep, self.agents, self.grid, statistics)
 
             # Progress feedback
             if self.timestep % 100 == 0:
                 print(f"Timestep {self.timestep}: "
-                      f"Active={len([a for a in self.agents if not a.evacuated])}, "
+                      f"Active={self.agents.active_count}, "
                       f"Evacuated={len(self.evacuated_agents)}")
 
         return self.timestep
 
     def get_statistics(self):
         """Get current simulation statistics."""
-        active = [a for a in self.agents if not a.evacuated]
+        stats = get_movement_statistics(self.agents)
         return {
             'timestep': self.timestep,
-            'active_agents': len(active),
+            'active_agents': stats['total_count'],
             'evacuated_agents': len(self.evacuated_agents),
-            'avg_panic': sum(a.panic_level for a in active) / len(active) if active else 0.0,
-            'max_panic': max((a.panic_level for a in active), default=0.0),
-            'avg_stamina': sum(a.stamina for a in active) / len(active) if active else 1.0,
+            'avg_panic': stats['avg_panic'],
+            'max_panic': stats['max_panic'],
+            'avg_stamina': stats['avg_stamina'],
+            'queued_agents': self.exit_queues.queued_count,
         }
 
+    def get_exit_statistics(self):
+        """Get per-door throughput and queue statistics.
+
+        Returns:
+            List of dicts, one per door (connected group of exit cells),
+            plus a 'closed' entry for evacuations through cells that have
+            since stopped being exits (e.g. environment.block_exit), so the
+            throughputs always add up to len(evacuated_agents)
+        """
+        exits = self.exit_queues
+        exits.sync(self.grid, self.agents)
+        cells = np.flatnonzero(exits.door_of_cell >= 0)
+        doors = exits.door_of_cell[cells]
+        cell_x, cell_y = np.divmod(cells, self.height)
+        center_x = np.bincount(doors, weights=cell_x, minlength=exits.num_doors) / np.maximum(exits.door_cells, 1)
+        center_y = np.bincount(doors, weights=cell_y, minlength=exits.num_doors) / np.maximum(exits.door_cells, 1)
+        throughput = exits.throughput
+        queue_lengths = exits.queue_lengths()
+
+        statistics = [
+            {
+                'door': door,
+                'cells': int(exits.door_cells[door]),
+                'center_x': float(center_x[door]),
+                'center_y': float(center_y[door]),
+                'capacity': exits.capacity,
+                'throughput': int(throughput[door]),
+                'queue_length': int(queue_lengths[door]),
+            }
+            for door in range(exits.num_doors)
+        ]
+
+        closed = np.flatnonzero((exits.door_of_cell < 0) & (exits.cell_throughput > 0))
+        if closed.size:
+            closed_x, closed_y = np.divmod(closed, self.height)
+            statistics.append({
+                'door': 'closed',
+                'cells': int(closed.size),
+                'center_x': float(closed_x.mean()),
+                'center_y': float(closed_y.mean()),
+                'capacity': exits.capacity,
+                'throughput': exits.closed_throughput,
+                'queue_length': 0,
+            })
+        return statistics
+
     def get_grid_snapshot(self):
         """Get current grid state for visualization."""
         return self.grid.get_grid_snapshot()
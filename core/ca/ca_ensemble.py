@@ -0,0 +1,202 @@
+"""Monte Carlo ensemble runner: many independently seeded CA replicas in parallel."""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy import stats
+
+from .ca_layout import CALayout
+
+# Per-run summary metrics aggregated across replicas
+SUMMARY_METRICS = [
+    'steps',
+    'total_agents',
+    'evacuated_agents',
+    'evacuation_rate',
+    'first_evacuation_step',
+    'time_to_50pct',
+    'time_to_90pct',
+    'time_to_100pct',
+    'avg_panic_final',
+    'max_panic_final',
+    'avg_stamina_final',
+]
+
+# Layout, installed once per worker process by init_worker
+_worker_layout = None
+
+
+def init_worker(layout):
+    """Pool initializer: keep the layout in the worker so tasks don't resend it."""
+    global _worker_layout
+    _worker_layout = layout
+
+
+def worker_layout():
+    """Layout installed in this worker process by init_worker."""
+    return _worker_layout
+
+
+def _first_step_reaching(evacuated_history, count):
+    """Number of steps until at least count agents had evacuated (None if never)."""
+    if count <= 0:
+        return None
+    reached = np.flatnonzero(np.asarray(evacuated_history) >= count)
+    return int(reached[0]) + 1 if reached.size else None
+
+
+def run_replica(layout, seed, mode='vectorized', max_timesteps=None, **params):
+    """Run one simulation of a layout and summarize it.
+
+    Args:
+        layout: CALayout (or a parsed configuration)
+        seed: Seed or SeedSequence for this replica
+        mode: Engine mode
+        max_timesteps: Override for params['simulation_steps']
+        **params: Passed to CALayout.create_simulation (closed_exits, param overrides)
+
+    Returns:
+        (summary dict, crowding heatmap as visits per timestep)
+    """
+    if not isinstance(layout, CALayout):
+        layout = CALayout(layout)
+    sim = layout.create_simulation(mode=mode, seed=seed, max_timesteps=max_timesteps, **params)
+    return summarize_run(sim)
+
+
+def summarize_run(sim):
+    """Run a simulation to the end and reduce it to a compact summary and heatmap.
+
+    Returns:
+        (summary dict, crowding heatmap as visits per timestep)
+    """
+    population = sim.agents
+    cells = sim.width * sim.height
+    visits = np.zeros(cells, dtype=np.int64)
+
+    while sim.timestep < sim.max_timesteps and population.active_count > 0:
+        sim.step()
+        rows = population.active_rows
+        visits += np.bincount(population.x[rows].astype(np.int64) * sim.height + population.y[rows],
+                              minlength=cells)
+
+    history = sim.history
+    total = len(population)
+    evacuated = len(sim.evacuated_agents)
+    final = sim.get_statistics()
+    summary = {
+        'steps': sim.timestep,
+        'total_agents': total,
+        'evacuated_agents': evacuated,
+        'evacuation_rate': evacuated / max(1, total),
+        'first_evacuation_step': _first_step_reaching(history['evacuated_agents'], 1),
+        'time_to_50pct': _first_step_reaching(history['evacuated_agents'], 0.5 * total),
+        'time_to_90pct': _first_step_reaching(history['evacuated_agents'], 0.9 * total),
+        'time_to_100pct': _first_step_reaching(history['evacuated_agents'], total),
+        'avg_panic_final': final['avg_panic'],
+        'max_panic_final': final['max_panic'],
+        'avg_stamina_final': final['avg_stamina'],
+    }
+
+    heatmap = (visits / max(1, sim.timestep)).reshape(sim.width, sim.height)
+    return summary, heatmap.astype(np.float32)
+
+
+def _run_worker_replica(replica, seed, mode, max_timesteps):
+    """Task entry point inside a worker process."""
+    summary, heatmap = run_replica(_worker_layout, seed, mode, max_timesteps)
+    summary['replica'] = replica
+    return summary, heatmap
+
+
+def aggregate_summaries(runs, confidence=0.95):
+    """Aggregate per-run summaries into mean, std and confidence interval.
+
+    Runs where a metric is None (e.g. 90% evacuation never reached) are
+    left out of that metric; 'n' reports how many runs contributed. With
+    fewer than two runs the spread is unknown: std, ci_low and ci_high are nan.
+
+    Returns:
+        {metric: {'n', 'mean', 'std', 'ci_low', 'ci_high'}}
+    """
+    aggregated = {}
+    for metric in SUMMARY_METRICS:
+        values = np.array([run[metric] for run in runs if run.get(metric) is not None], dtype=float)
+        n = len(values)
+        mean = float(values.mean()) if n else float('nan')
+        std = float(values.std(ddof=1)) if n > 1 else float('nan')
+        half_width = float(stats.t.ppf(0.5 + confidence / 2, n - 1) * std / np.sqrt(n)) if n > 1 else float('nan')
+        aggregated[metric] = {
+            'n': n,
+            'mean': mean,
+            'std': std,
+            'ci_low': mean - half_width,
+            'ci_high': mean + half_width,
+        }
+    return aggregated
+
+
+def run_ensemble(config, replicas, seed=None, mode='vectorized', max_timesteps=None,
+                 max_workers=None, confidence=0.95):
+    """Run independently seeded replicas of one layout across a process pool.
+
+    The layout, with its exit distance field already computed, is sent
+    to each worker once, at start-up; tasks only carry their replica seed. Replica seeds are spawned from
+    one SeedSequence, so the whole ensemble is reproducible from seed.
+
+    Args:
+        config: Parsed configuration (parse_excel_config result) or CALayout
+        replicas: Number of replicas (at least 1)
+        seed: Base seed for the ensemble (default: fresh entropy)
+        mode: Engine mode used by every replica
+        max_timesteps: Override for params['simulation_steps']
+        max_workers: Worker processes (default: all cores)
+        confidence: Confidence level for the intervals
+
+    Returns:
+        {
+            'runs': per-replica summaries ordered by replica,
+            'summary': aggregate_summaries result,
+            'crowding_mean': mean crowding heatmap,
+            'crowding_std': per-cell standard deviation across replicas (nan for a single replica),
+        }
+    """
+    if replicas < 1:
+        raise ValueError(f"replicas must be at least 1, got {replicas}")
+    layout = config if isinstance(config, CALayout) else CALayout(config)
+    layout.get_exit_distance_field()  # Computed once here, shipped to every worker
+    seeds = np.random.SeedSequence(seed).spawn(replicas)
+    max_workers = min(max_workers or os.cpu_count() or 1, replicas)
+
+    runs = []
+    heatmap_sum = None
+    heatmap_sq_sum = None
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(layout,)) as pool:
+        futures = [pool.submit(_run_worker_replica, replica, seeds[replica], mode, max_timesteps)
+                   for replica in range(replicas)]
+
+        # Fold heatmaps in as they arrive so only running sums are kept
+        for future in as_completed(futures):
+            summary, heatmap = future.result()
+            runs.append(summary)
+            heatmap = heatmap.astype(np.float64)
+            if heatmap_sum is None:
+                heatmap_sum = np.zeros_like(heatmap)
+                heatmap_sq_sum = np.zeros_like(heatmap)
+            heatmap_sum += heatmap
+            heatmap_sq_sum += heatmap ** 2
+
+    runs.sort(key=lambda run: run['replica'])
+    crowding_mean = heatmap_sum / replicas
+    if replicas > 1:
+        crowding_var = (heatmap_sq_sum / replicas - crowding_mean ** 2) * (replicas / (replicas - 1))
+        crowding_std = np.sqrt(np.maximum(crowding_var, 0.0))
+    else:
+        crowding_std = np.full_like(crowding_mean, np.nan)  # No spread from a single run, as in aggregate_summaries
+
+    return {
+        'runs': runs,
+        'summary': aggregate_summaries(runs, confidence),
+        'crowding_mean': crowding_mean,
+        'crowding_std': crowding_std,
+    }
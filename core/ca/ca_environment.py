@@ -1,5 +1,9 @@
 """Static environment management for CA simulation."""
-from .ca_grid import CELL_EXIT, CELL_ENTRANCE
+import numpy as np
+
+from .ca_grid import CELL_WALL, CELL_EXIT, CELL_ENTRANCE
+from .ca_fields import compute_exit_distance_field, manhattan_window_sum
+from .ca_population import AgentPopulation
 
 
 class CAEnvironment:
@@ -8,29 +12,63 @@ class CAEnvironment:
     def __init__(self, grid):
         """Initialize environment with reference to grid."""
         self.grid = grid
-        self.exits = []
-        self.entrances = []
+
+        # Static floor field: walking distance to nearest exit, per cell
+        self._exit_distance_field = None
+        self._field_version = None  # grid.layout_version the field was built at
+
+        # Crowd density index: {radius: per-cell agent count within radius}
+        self._density_fields = {}
+        self._density_version = None  # grid.occupancy_version the index was built at
+
+    @property
+    def exits(self):
+        """Exit cell positions, from the grid's incremental registry."""
+        return self.grid.get_all_exits()
+
+    @property
+    def entrances(self):
+        """Entrance cell positions, from the grid's incremental registry."""
+        return self.grid.get_all_entrances()
 
     def load_from_grid(self):
-        """Load exits and entrances from grid's static layer."""
-        self.exits = self.grid.get_all_exits()
-        self.entrances = self.grid.get_all_entrances()
+        """Load exits and entrances from grid's static layer.
+
+        The grid keeps its exit/entrance registry up to date on every
+        set_cell_type, so this is only needed after writing
+        grid.static_layer directly.
+        """
+        self.grid.rebuild_layout_index()
+
+    def get_exit_distance_field(self):
+        """Get wall-aware distance-to-exit field, rebuilt only after layout changes."""
+        if self._field_version != self.grid.layout_version:
+            self._exit_distance_field = compute_exit_distance_field(self.grid.static_layer)
+            self._field_version = self.grid.layout_version
+        return self._exit_distance_field
+
+    def set_exit_distance_field(self, field):
+        """Use a precomputed distance-to-exit field for the current layout.
+
+        Lets many simulations of one layout share a single field (see
+        CALayout). It is replaced as usual once the layout changes.
+        """
+        self._exit_distance_field = field
+        self._field_version = self.grid.layout_version
 
     def add_exit(self, x, y):
         """Add exit point."""
-        if self.grid.set_cell_type(x, y, CELL_EXIT):
-            if (x, y) not in self.exits:
-                self.exits.append((x, y))
-            return True
-        return False
+        return self.grid.set_cell_type(x, y, CELL_EXIT)
+
+    def block_exit(self, x, y):
+        """Close an exit cell by turning it into a wall."""
+        if self.grid.get_cell_type(x, y) != CELL_EXIT:
+            return False
+        return self.grid.set_cell_type(x, y, CELL_WALL)
 
     def add_entrance(self, x, y):
         """Add entrance point."""
-        if self.grid.set_cell_type(x, y, CELL_ENTRANCE):
-            if (x, y) not in self.entrances:
-                self.entrances.append((x, y))
-            return True
-        return False
+        return self.grid.set_cell_type(x, y, CELL_ENTRANCE)
 
     def get_nearest_exit(self, x, y):
         """Find nearest exit using Manhattan distance."""
@@ -49,11 +87,8 @@ class CAEnvironment:
         return nearest
 
     def get_distance_to_exit(self, x, y):
-        """Get Manhattan distance to nearest exit."""
-        exit_pos = self.get_nearest_exit(x, y)
-        if exit_pos is None:
-            return float('inf')
-        return abs(x - exit_pos[0]) + abs(y - exit_pos[1])
+        """Get walking distance to nearest exit around walls (inf if unreachable)."""
+        return float(self.get_exit_distance_field()[x, y])
 
     def get_nearest_entrance(self, x, y):
         """Find nearest entrance using Manhattan distance."""
@@ -70,14 +105,26 @@ class CAEnvironment:
 
         return nearest
 
+    def get_density_field(self, radius=5):
+        """Get per-cell count of agents within Manhattan radius.
+
+        The index is rebuilt lazily the first time it is queried after agents
+        moved, so within one intention stage it is built once and every
+        query is an O(1) lookup.
+        """
+        if self._density_version != self.grid.occupancy_version:
+            self._density_fields = {}
+            self._density_version = self.grid.occupancy_version
+
+        field = self._density_fields.get(radius)
+        if field is None:
+            field = manhattan_window_sum(self.grid.get_occupancy_counts(), radius)
+            self._density_fields[radius] = field
+        return field
+
     def count_nearby_agents(self, x, y, radius=5):
         """Count agents within radius."""
-        count = 0
-        for agent_x, agent_y in self.grid.agent_positions.values():
-            dist = abs(x - agent_x) + abs(y - agent_y)
-            if dist <= radius:
-                count += 1
-        return count
+        return int(self.get_density_field(radius)[x, y])
 
     def get_avg_panic_nearby(self, x, y, agents, radius=3):
         """Get average panic level of nearby agents."""
@@ -86,6 +133,8 @@ class CAEnvironment:
 
         nearby_panic = []
         for agent in agents:
+            if agent.evacuated:
+                continue
             dist = abs(x - agent.x) + abs(y - agent.y)
             if dist <= radius:
                 nearby_panic.append(agent.panic_level)
@@ -93,3 +142,37 @@ class CAEnvironment:
         if nearby_panic:
             return sum(nearby_panic) / len(nearby_panic)
         return 0.0
+
+    def get_panic_average_field(self, agents, radius=3):
+        """Get per-cell average panic of active agents within Manhattan radius.
+
+        Panic sums and agent counts are scattered onto the grid once and
+        window-summed, so the neighbourhood average of every cell comes from
+        a single vectorized pass instead of one scan per agent.
+
+        Returns:
+            2D float array (0.0 where no agent is within radius)
+        """
+        if isinstance(agents, AgentPopulation):
+            active = agents.active_rows
+            xs, ys, panic = agents.x[active], agents.y[active], agents.panic[active]
+        else:
+            active = [a for a in agents if not a.evacuated]
+            xs = np.array([a.x for a in active], dtype=np.int32)
+            ys = np.array([a.y for a in active], dtype=np.int32)
+            panic = np.array([a.panic_level for a in active], dtype=float)
+
+        shape = (self.grid.width, self.grid.height)
+        flat = xs.astype(np.int64) * self.grid.height + ys
+
+        # Sum each cell's panic in ascending order, so the result does not depend on
+        # how the agents are stored (see ca_distributed)
+        order = np.lexsort((panic, flat))
+        flat, panic = flat[order], panic[order]
+        panic_sum = np.bincount(flat, weights=panic, minlength=shape[0] * shape[1]).reshape(shape)
+        counts = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+
+        window_panic = manhattan_window_sum(panic_sum, radius)
+        window_counts = manhattan_window_sum(counts, radius)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(window_counts > 0, window_panic / window_counts, 0.0)
@@ -0,0 +1,179 @@
+"""Exit doors with throughput capacity and FIFO queues for CA simulation."""
+import numpy as np
+from scipy import ndimage
+
+from .ca_grid import CELL_EXIT
+
+UNLIMITED = None  # Exit capacity value for instant evacuation
+
+
+class ExitQueues:
+    """Exit doors, their throughput counters and (with a capacity) their queues.
+
+    A door is a connected group of exit cells (8-neighbourhood). With a
+    capacity, an agent reaching an exit cell waits there in its door's
+    FIFO queue, and each step every door lets at most capacity queued
+    agents out. Waiting agents hold their cell, so the queue spills back
+    into the room as a physical crowd.
+
+    All queues share one flat ring buffer: door d owns the slots
+    offset[d]:offset[d] + size[d], with head[d] and count[d] marking
+    the live entries. Enqueue and release are whole-array operations
+    over the doors involved, so hundreds of exit cells cost no Python
+    loop per cell.
+    """
+
+    def __init__(self, capacity=UNLIMITED):
+        """Initialize with capacity in agents per step per door (None = unlimited)."""
+        self.capacity = capacity
+        self.num_doors = 0
+        self.door_of_cell = None  # Flat cell index -> door index, -1 for non-exit cells
+        self.door_cells = np.zeros(0, dtype=np.int64)  # Exit cells per door
+
+        # Evacuations per exit cell; per-door counts are summed from it, so
+        # they survive door renumbering after layout changes, and cells that
+        # stop being exits keep their count (closed_throughput)
+        self.cell_throughput = None
+        self._layout_version = None
+
+        # Ring buffer
+        self._buffer = np.zeros(0, dtype=np.int64)
+        self._offset = np.zeros(0, dtype=np.int64)
+        self._size = np.zeros(0, dtype=np.int64)
+        self._head = np.zeros(0, dtype=np.int64)
+        self._count = np.zeros(0, dtype=np.int64)
+
+    @property
+    def limited(self):
+        """True if doors have a throughput capacity."""
+        return self.capacity is not UNLIMITED
+
+    @property
+    def throughput(self):
+        """Agents evacuated through each door so far."""
+        if self.door_of_cell is None:
+            return np.zeros(0, dtype=np.int64)
+        exits = np.flatnonzero(self.door_of_cell >= 0)
+        return np.bincount(self.door_of_cell[exits], weights=self.cell_throughput[exits],
+                           minlength=self.num_doors).astype(np.int64)
+
+    @property
+    def closed_throughput(self):
+        """Agents evacuated through cells that are no longer exits."""
+        if self.door_of_cell is None:
+            return 0
+        return int(self.cell_throughput[self.door_of_cell < 0].sum())
+
+    @property
+    def queued_count(self):
+        """Total number of agents waiting at doors."""
+        return int(self._count.sum())
+
+    def sync(self, grid, population):
+        """Rebuild doors after a layout change, keeping queued agents in order.
+
+        Queued agents whose cell is no longer an exit leave the queue.
+        """
+        if self._layout_version == grid.layout_version:
+            return
+        self._layout_version = grid.layout_version
+
+        waiting = self.queued_rows()
+        if self.cell_throughput is None:
+            self.cell_throughput = np.zeros(grid.width * grid.height, dtype=np.int64)
+
+        labels, self.num_doors = ndimage.label(grid.static_layer == CELL_EXIT, structure=np.ones((3, 3)))
+        self.door_of_cell = labels.ravel().astype(np.int64) - 1
+        self.door_cells = np.bincount(self.door_of_cell[self.door_of_cell >= 0], minlength=self.num_doors)
+        self._allocate(np.maximum(self.door_cells, 1))
+
+        population.column('queued')[waiting] = False
+        doors = self.doors_at(population.x[waiting], population.y[waiting], grid.height)
+        self.enqueue(waiting[doors >= 0], doors[doors >= 0], population)
+
+    def doors_at(self, xs, ys, height):
+        """Door index for each (x, y) cell, -1 where the cell is not an exit."""
+        return self.door_of_cell[np.asarray(xs, dtype=np.int64) * height + ys]
+
+    def count_evacuated(self, xs, ys, height):
+        """Add evacuations at exit cells (x, y) to the throughput counters."""
+        np.add.at(self.cell_throughput, np.asarray(xs, dtype=np.int64) * height + ys, 1)
+
+    def enqueue(self, rows, doors, population):
+        """Append rows to the back of their doors' queues, in the given order."""
+        if len(rows) == 0:
+            return
+        arrivals = np.bincount(doors, minlength=self.num_doors)
+        if np.any(self._count + arrivals > self._size):
+            # More waiting agents than door cells (agents sharing a cell): grow the rings
+            queues = [self._buffer[self._slots(np.full(count, door), np.arange(count))]
+                      for door, count in enumerate(self._count.tolist())]
+            self._allocate(np.maximum(self._size * 2, self._count + arrivals), queues)
+
+        # Position of each arrival behind the agents already queued at its door
+        order = np.argsort(doors, kind='stable')
+        sorted_doors = doors[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sorted_doors[1:] != sorted_doors[:-1]
+        starts = np.flatnonzero(first)
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order))))
+
+        slots = self._slots(sorted_doors, self._count[sorted_doors] + rank)
+        self._buffer[slots] = rows[order]
+        self._count += arrivals
+        population.column('queued')[rows] = True
+
+    def release(self, population, height):
+        """Let up to capacity agents out of the front of every door queue.
+
+        Returns:
+            Released rows, door by door in FIFO order
+        """
+        doors = np.flatnonzero(self._count)
+        if doors.size == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        released = np.minimum(self._count[doors], self.capacity)
+        released_doors = np.repeat(doors, released)
+        first = np.repeat(np.cumsum(released) - released, released)
+        rows = self._buffer[self._slots(released_doors, np.arange(len(released_doors)) - first)]
+
+        self._head[doors] = (self._head[doors] + released) % self._size[doors]
+        self._count[doors] -= released
+        population.column('queued')[rows] = False
+        self.count_evacuated(population.x[rows], population.y[rows], height)
+        return rows
+
+    def queued_rows(self):
+        """All queued rows, door by door in FIFO order."""
+        doors = np.flatnonzero(self._count)
+        if doors.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        counts = self._count[doors]
+        door_index = np.repeat(doors, counts)
+        position = np.arange(len(door_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self._buffer[self._slots(door_index, position)]
+
+    def queue_lengths(self):
+        """Number of waiting agents per door."""
+        return self._count.copy()
+
+    def _slots(self, doors, positions):
+        """Buffer slots of queue positions (0 = front) at the given doors."""
+        return self._offset[doors] + (self._head[doors] + positions) % self._size[doors]
+
+    def _allocate(self, sizes, queues=None):
+        """Allocate ring buffers with the given per-door sizes.
+
+        Args:
+            sizes: Ring size per door
+            queues: Optional per-door arrays of rows to refill the queues with
+        """
+        self._size = np.asarray(sizes, dtype=np.int64)
+        self._offset = np.cumsum(self._size) - self._size
+        self._buffer = np.zeros(int(self._size.sum()), dtype=np.int64)
+        self._head = np.zeros(len(self._size), dtype=np.int64)
+        self._count = np.zeros(len(self._size), dtype=np.int64)
+        for door, rows in enumerate(queues or []):
+            self._buffer[self._offset[door]:self._offset[door] + len(rows)] = rows
+            self._count[door] = len(rows)
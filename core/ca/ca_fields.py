@@ -0,0 +1,97 @@
+"""Precomputed floor fields for CA simulation."""
+import numpy as np
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .ca_grid import CELL_WALL, CELL_EXIT
+
+# Half of the 8-neighbourhood: the graph is undirected, so each edge is added once
+_EDGE_OFFSETS = [(1, 0, 1.0), (0, 1, 1.0), (1, 1, np.sqrt(2.0)), (1, -1, np.sqrt(2.0))]
+
+
+def compute_exit_distance_field(static_layer):
+    """Compute wall-aware walking distance from every cell to its nearest exit.
+
+    Runs a multi-source Dijkstra from all CELL_EXIT cells over the
+    8-neighbourhood with octile weights (1 for straight steps, sqrt(2)
+    for diagonal steps). Walls are impassable.
+
+    Args:
+        static_layer: 2D array of cell types, indexed [x, y]
+
+    Returns:
+        2D float array of distances; np.inf for walls and unreachable cells
+    """
+    width, height = static_layer.shape
+    walkable = static_layer != CELL_WALL
+    exit_cells = np.flatnonzero(static_layer == CELL_EXIT)
+
+    if exit_cells.size == 0:
+        return np.full((width, height), np.inf)
+
+    index = np.arange(width * height).reshape(width, height)
+    sources, targets, weights = [], [], []
+    for dx, dy, weight in _EDGE_OFFSETS:
+        x_src = slice(max(0, -dx), width - max(0, dx))
+        y_src = slice(max(0, -dy), height - max(0, dy))
+        x_dst = slice(max(0, dx), width - max(0, -dx))
+        y_dst = slice(max(0, dy), height - max(0, -dy))
+
+        both_walkable = walkable[x_src, y_src] & walkable[x_dst, y_dst]
+        sources.append(index[x_src, y_src][both_walkable])
+        targets.append(index[x_dst, y_dst][both_walkable])
+        weights.append(np.full(int(both_walkable.sum()), weight))
+
+    size = width * height
+    graph = coo_matrix(
+        (np.concatenate(weights), (np.concatenate(sources), np.concatenate(targets))),
+        shape=(size, size),
+    ).tocsr()
+
+    distances = dijkstra(graph, directed=False, indices=exit_cells, min_only=True)
+    distances[~walkable.ravel()] = np.inf
+    return distances.reshape(width, height)
+
+
+def compute_wall_distance_field(static_layer):
+    """Compute straight-line (Euclidean) distance from every cell to its nearest wall.
+
+    Args:
+        static_layer: 2D array of cell types, indexed [x, y]
+
+    Returns:
+        2D float array of distances; 0 for walls, np.inf everywhere if there are no walls
+    """
+    walkable = static_layer != CELL_WALL
+    if walkable.all():
+        return np.full(static_layer.shape, np.inf)
+    return ndimage.distance_transform_edt(walkable)
+
+
+def manhattan_window_sum(values, radius):
+    """Sum values over the diamond |dx| + |dy| <= radius around every cell.
+
+    Uses prefix sums along y, so each diamond is 2 * radius + 1 column
+    segments and the whole field costs O(cells * radius). Cells outside
+    the grid count as zero.
+
+    Args:
+        values: 2D array indexed [x, y]
+        radius: Manhattan radius of the window
+
+    Returns:
+        2D array of window sums, same shape as values
+    """
+    width, height = values.shape
+    padded = np.zeros((width + 2 * radius, height + 2 * radius + 1), dtype=values.dtype)
+    padded[radius:radius + width, radius + 1:radius + 1 + height] = values
+    prefix = np.cumsum(padded, axis=1)
+
+    total = np.zeros((width, height), dtype=prefix.dtype)
+    for dx in range(-radius, radius + 1):
+        half = radius - abs(dx)
+        columns = prefix[radius + dx:radius + dx + width]
+        total += columns[:, radius + half + 1:radius + half + 1 + height]
+        total -= columns[:, radius - half:radius - half + height]
+    return total
@@ -29,6 +29,19 @@ class CAGrid:
         # Track agent occupancy (multiple agents per cell possible in tracking)
         self.agent_positions = {}  # {agent_id: (x, y)}
 
+        # Bumped on every agent placement/move/removal so derived fields know when to rebuild
+        self.occupancy_version = 0
+
+        # Exit/entrance registry, kept up to date by set_cell_type/load_static_layer
+        self._exits = set()
+        self._entrances = set()
+        self._sorted_exits = None
+        self._sorted_entrances = None
+
+        # Bumped on every static layout change; caches built from the layout
+        # (distance fields, etc.) compare against it to know they are dirty
+        self.layout_version = 0
+
     def is_walkable(self, x, y):
         """Check if cell is walkable (not a wall)."""
         if not (0 <= x < self.width and 0 <= y < self.height):
@@ -55,6 +68,7 @@ class CAGrid:
 
         self.agent_positions[agent_id] = (x, y)
         self.dynamic_layer[x, y] = CELL_PERSON
+        self.occupancy_version += 1
         return True
 
     def move_agent(self, agent_id, new_x, new_y):
@@ -68,8 +82,16 @@ class CAGrid:
         self.dynamic_layer[old_x, old_y] = CELL_EMPTY
         self.agent_positions[agent_id] = (new_x, new_y)
         self.dynamic_layer[new_x, new_y] = CELL_PERSON
+        self.occupancy_version += 1
         return True
 
+    def apply_moves(self, agent_ids, old_xs, old_ys, new_xs, new_ys):
+        """Move many agents at once (targets must already be known walkable)."""
+        self.dynamic_layer[old_xs, old_ys] = CELL_EMPTY
+        self.dynamic_layer[new_xs, new_ys] = CELL_PERSON
+        self.agent_positions.update(zip(agent_ids.tolist(), zip(new_xs.tolist(), new_ys.tolist())))
+        self.occupancy_version += 1
+
     def remove_agent(self, agent_id):
         """Remove agent from grid."""
         if agent_id not in self.agent_positions:
@@ -77,8 +99,22 @@ class CAGrid:
         x, y = self.agent_positions[agent_id]
         self.dynamic_layer[x, y] = CELL_EMPTY
         del self.agent_positions[agent_id]
+        self.occupancy_version += 1
         return True
 
+    def get_occupancy_counts(self):
+        """Get per-cell agent counts from tracked positions.
+
+        Unlike dynamic_layer this counts every agent, even when two agents
+        briefly share a cell after conflict resolution.
+        """
+        if not self.agent_positions:
+            return np.zeros((self.width, self.height), dtype=np.int32)
+        positions = np.array(list(self.agent_positions.values()))
+        flat = positions[:, 0] * self.height + positions[:, 1]
+        counts = np.bincount(flat, minlength=self.width * self.height)
+        return counts.reshape(self.width, self.height).astype(np.int32)
+
     def get_neighbors_8(self, x, y):
         """Get all 8-neighbor coordinates around (x, y)."""
         neighbors = []
@@ -101,26 +137,53 @@ class CAGrid:
         """Set static cell type at position."""
         if not (0 <= x < self.width and 0 <= y < self.height):
             return False
+        if self.static_layer[x, y] == cell_type:
+            return True
+
         self.static_layer[x, y] = cell_type
+        self._exits.discard((x, y))
+        self._entrances.discard((x, y))
+        if cell_type == CELL_EXIT:
+            self._exits.add((x, y))
+        elif cell_type == CELL_ENTRANCE:
+            self._entrances.add((x, y))
+        self._mark_layout_changed()
         return True
 
+    def load_static_layer(self, layer):
+        """Replace the whole static layer at once and rebuild the registry."""
+        self.static_layer[:] = layer
+        self.rebuild_layout_index()
+
+    def rebuild_layout_index(self):
+        """Rebuild exit/entrance registry from static_layer.
+
+        Only needed after writing static_layer directly instead of going
+        through set_cell_type or load_static_layer.
+        """
+        exit_x, exit_y = np.nonzero(self.static_layer == CELL_EXIT)
+        entrance_x, entrance_y = np.nonzero(self.static_layer == CELL_ENTRANCE)
+        self._exits = set(zip(exit_x.tolist(), exit_y.tolist()))
+        self._entrances = set(zip(entrance_x.tolist(), entrance_y.tolist()))
+        self._mark_layout_changed()
+
+    def _mark_layout_changed(self):
+        """Invalidate everything derived from the static layer."""
+        self._sorted_exits = None
+        self._sorted_entrances = None
+        self.layout_version += 1
+
     def get_all_exits(self):
         """Get all exit cell positions."""
-        exits = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if self.static_layer[x, y] == CELL_EXIT:
-                    exits.append((x, y))
-        return exits
+        if self._sorted_exits is None:
+            self._sorted_exits = sorted(self._exits)
+        return list(self._sorted_exits)
 
     def get_all_entrances(self):
         """Get all entrance cell positions."""
-        entrances = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if self.static_layer[x, y] == CELL_ENTRANCE:
-                    entrances.append((x, y))
-        return entrances
+        if self._sorted_entrances is None:
+            self._sorted_entrances = sorted(self._entrances)
+        return list(self._sorted_entrances)
 
     def get_grid_snapshot(self):
         """Get combined visualization layer (static + dynamic)."""
@@ -128,8 +191,9 @@ class CAGrid:
         snapshot = self.static_layer.copy()
 
         # Overlay person positions
-        for x, y in self.agent_positions.values():
-            if snapshot[x, y] == CELL_EMPTY:
-                snapshot[x, y] = CELL_PERSON
+        if self.agent_positions:
+            xs, ys = np.array(list(self.agent_positions.values())).T
+            on_empty = snapshot[xs, ys] == CELL_EMPTY
+            snapshot[xs[on_empty], ys[on_empty]] = CELL_PERSON
 
         return snapshot
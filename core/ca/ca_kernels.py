@@ -0,0 +1,159 @@
+"""Optional JIT-compiled (numba) kernels for the vectorized CA step stages.
+
+Each kernel is a plain per-agent loop, so branch-heavy decisions such as
+greedy vs. random choice are written like the reference rules instead of
+as masked array expressions. They use the same arithmetic, in the same
+order, as ca_vectorized, so both backends give identical results.
+
+numba is optional: without it, the 'auto' backend falls back to the
+NumPy implementation in ca_vectorized.
+"""
+import numpy as np
+
+from .ca_grid import CELL_WALL
+from .ca_behaviors import (
+    CROWD_RADIUS, PANIC_RADIUS, HIGH_PANIC_THRESHOLD, RANDOM_CHOICE_PROB, HIGH_PANIC_RANDOM_CHOICE_PROB,
+    TIEBREAK_SCALE,
+)
+from .ca_vectorized import NEIGHBOR_DX, NEIGHBOR_DY
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Kernel backends for the vectorized engine mode
+BACKENDS = ('auto', 'numpy', 'numba')
+NUMBA_AVAILABLE = numba is not None
+
+
+def resolve_backend(backend):
+    """Resolve a backend name to 'numpy' or 'numba'.
+
+    'auto' picks numba when it is installed and NumPy otherwise.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend '{backend}', expected one of {BACKENDS}")
+    if backend == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("The 'numba' backend requires numba to be installed")
+    return backend
+
+
+def _jit(function):
+    """Compile with numba (cached on disk), or leave as Python if numba is missing."""
+    if numba is None:
+        return function
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+@_jit
+def _select_kernel(x, y, panic, queued, explore, pick, static_layer, exit_field, density_field,
+                   neighbor_dx, neighbor_dy):
+    """Per-agent neighbour scoring and greedy/random choice."""
+    width, height = static_layer.shape
+    n = len(x)
+    target_x = x.copy()
+    target_y = y.copy()
+    walkable_x = np.empty(8, dtype=np.int64)
+    walkable_y = np.empty(8, dtype=np.int64)
+
+    for i in range(n):
+        if queued[i]:
+            continue  # Waiting in an exit queue: stay in place
+
+        n_walkable = 0
+        best = -1
+        best_score = -np.inf
+        for k in range(8):
+            nx = x[i] + neighbor_dx[k]
+            ny = y[i] + neighbor_dy[k]
+            if nx < 0 or nx >= width or ny < 0 or ny >= height or static_layer[nx, ny] == CELL_WALL:
+                continue
+            walkable_x[n_walkable] = nx
+            walkable_y[n_walkable] = ny
+            n_walkable += 1
+
+            # Same terms and operation order as calculate_cell_attractiveness
+            score = -exit_field[nx, ny] + (-density_field[nx, ny] * 2.0) + panic[i] * 1.0
+            if best < 0 or score > best_score:  # First best walkable neighbour
+                best = n_walkable - 1
+                best_score = score
+
+        if n_walkable == 0:
+            continue
+
+        random_choice_prob = HIGH_PANIC_RANDOM_CHOICE_PROB if panic[i] > HIGH_PANIC_THRESHOLD else RANDOM_CHOICE_PROB
+        if explore[i] < random_choice_prob:
+            choice = min(int(pick[i] * n_walkable), n_walkable - 1)
+        else:
+            choice = best
+        target_x[i] = walkable_x[choice]
+        target_y[i] = walkable_y[choice]
+
+    return target_x, target_y
+
+
+@_jit
+def _conflict_kernel(cells, priority, order, n_cells):
+    """Highest priority claim per cell, lower order winning exact ties."""
+    best = np.full(n_cells, -1, dtype=np.int64)
+    for i in range(len(cells)):
+        cell = cells[i]
+        current = best[cell]
+        if (current < 0 or priority[i] > priority[current]
+                or (priority[i] == priority[current] and order[i] < order[current])):
+            best[cell] = i
+
+    winners = np.zeros(len(cells), dtype=np.bool_)
+    for i in range(len(cells)):
+        if best[cells[i]] == i:
+            winners[i] = True
+    return winners
+
+
+@_jit
+def _panic_kernel(panic, resilience, x, y, panic_field, panic_spread_rate, panic_decay_rate):
+    """Synchronous panic update, same arithmetic as CAAgent.update_panic/decay_panic."""
+    result = np.empty(len(panic))
+    for i in range(len(panic)):
+        nearby_panic = panic_field[x[i], y[i]] * panic_spread_rate
+        susceptibility = 1.0 - resilience[i]
+        value = min(1.0, panic[i] + nearby_panic * susceptibility)
+        result[i] = max(0.0, value - panic_decay_rate)
+    return result
+
+
+def select_next_cells(rows, population, environment, grid, draws):
+    """Choose a target cell for every agent row in rows (see ca_vectorized).
+
+    Returns:
+        (target_x, target_y) int arrays aligned with rows
+    """
+    return _select_kernel(
+        population.x[rows].astype(np.int64), population.y[rows].astype(np.int64), population.panic[rows],
+        population.column('queued')[rows], draws.explore[rows], draws.pick[rows], grid.static_layer,
+        environment.get_exit_distance_field(), environment.get_density_field(CROWD_RADIUS),
+        NEIGHBOR_DX, NEIGHBOR_DY)
+
+
+def resolve_conflicts(rows, target_x, target_y, population, grid, draws):
+    """Pick one winner per target cell among the claiming rows (see ca_vectorized).
+
+    Returns:
+        Boolean array aligned with rows, True where the agent won its cell
+    """
+    cells = target_x.astype(np.int64) * grid.height + target_y
+    priority = population.priority_multiplier[rows] + population.panic[rows] * 0.5
+    priority = np.where(population.column('queued')[rows], np.inf, priority)  # Queued agents keep their cell
+    priority = priority + draws.jitter[rows] * TIEBREAK_SCALE
+    return _conflict_kernel(cells, priority, np.asarray(rows, dtype=np.int64), grid.width * grid.height)
+
+
+def update_panic(rows, population, environment, panic_spread_rate, panic_decay_rate):
+    """Update panic of rows from their neighbourhood (see ca_vectorized)."""
+    panic_field = environment.get_panic_average_field(population, radius=PANIC_RADIUS)
+    population.panic[rows] = _panic_kernel(
+        population.panic[rows], population.resilience[rows], population.x[rows], population.y[rows],
+        panic_field, panic_spread_rate, panic_decay_rate)
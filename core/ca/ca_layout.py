@@ -0,0 +1,109 @@
+"""Parsed layout with shared static precomputation for many simulation runs."""
+import numpy as np
+
+from .ca_grid import CELL_WALL, CELL_EXIT
+from .ca_fields import compute_exit_distance_field, compute_wall_distance_field
+from .ca_engine import CASimulation
+
+
+class CALayout:
+    """One parsed museum layout, prepared once and reused by many runs.
+
+    Holds the static layer, the config's parameters and agent specs, and
+    the exit distance field for every exit configuration used so far.
+    Simulations created from the layout get the cached field injected
+    instead of each running its own Dijkstra pass. Fields can also be
+    handed in precomputed, e.g. from a layout cache file.
+    """
+
+    def __init__(self, config):
+        """Build layout from a parsed configuration (parse_excel_config result)."""
+        self.width = config['width']
+        self.height = config['height']
+        self.params = dict(config['params'])
+        self.agents = list(config['agents'])
+        self.static_layer = np.asarray(config['grid_data'], dtype=np.uint8)
+
+        exit_x, exit_y = np.nonzero(self.static_layer == CELL_EXIT)
+        self.exits = list(zip(exit_x.tolist(), exit_y.tolist()))
+
+        # {frozenset of closed exit cells: exit distance field}
+        self._exit_fields = {}
+        self._wall_field = None
+
+    def get_static_layer(self, closed_exits=()):
+        """Get static layer with the given exit cells closed (turned into walls)."""
+        if not closed_exits:
+            return self.static_layer
+        layer = self.static_layer.copy()
+        for x, y in closed_exits:
+            if layer[x, y] != CELL_EXIT:
+                raise ValueError(f"({x}, {y}) is not an exit cell")
+            layer[x, y] = CELL_WALL
+        return layer
+
+    def get_exit_distance_field(self, closed_exits=()):
+        """Get exit distance field for an exit configuration, computed once."""
+        key = frozenset(map(tuple, closed_exits))
+        if key not in self._exit_fields:
+            field = compute_exit_distance_field(self.get_static_layer(closed_exits))
+            field.flags.writeable = False  # Shared by every simulation of this configuration
+            self._exit_fields[key] = field
+        return self._exit_fields[key]
+
+    def set_exit_distance_field(self, field, closed_exits=()):
+        """Use a precomputed exit distance field for an exit configuration."""
+        field = np.asarray(field)
+        if field.shape != self.static_layer.shape:
+            raise ValueError(f"Field shape {field.shape} does not match the layout {self.static_layer.shape}")
+        field.flags.writeable = False
+        self._exit_fields[frozenset(map(tuple, closed_exits))] = field
+
+    def get_wall_distance_field(self):
+        """Get straight-line distance to the nearest wall for every cell, computed once."""
+        if self._wall_field is None:
+            self._wall_field = compute_wall_distance_field(self.static_layer)
+            self._wall_field.flags.writeable = False
+        return self._wall_field
+
+    def set_wall_distance_field(self, field):
+        """Use a precomputed wall distance field."""
+        field = np.asarray(field)
+        if field.shape != self.static_layer.shape:
+            raise ValueError(f"Field shape {field.shape} does not match the layout {self.static_layer.shape}")
+        field.flags.writeable = False
+        self._wall_field = field
+
+    def create_simulation(self, mode='reference', seed=None, max_timesteps=None, closed_exits=(), backend='auto',
+                          **params):
+        """Create a simulation of this layout.
+
+        Args:
+            mode: Engine mode, see CASimulation
+            seed: Seed for the random generator (default: params['random_seed'])
+            max_timesteps: Override for params['simulation_steps']
+            closed_exits: Exit cells to close for this run
+            backend: Kernel backend, see CASimulation
+            **params: Overrides for config params (initial_population,
+                panic_spread_rate, panic_decay_rate, exit_capacity, ...)
+
+        Returns:
+            CASimulation with layout, exit field and agents loaded
+        """
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+        params = {**self.params, **params}
+        if max_timesteps is None:
+            max_timesteps = params['simulation_steps']
+        if seed is None:
+            seed = params.get('random_seed')
+
+        sim = CASimulation(self.width, self.height, max_timesteps=max_timesteps, mode=mode, seed=seed,
+                           panic_spread_rate=params['panic_spread_rate'],
+                           panic_decay_rate=params['panic_decay_rate'],
+                           exit_capacity=params.get('exit_capacity'), backend=backend)
+        sim.grid.load_static_layer(self.get_static_layer(closed_exits))
+        sim.environment.set_exit_distance_field(self.get_exit_distance_field(closed_exits))
+        sim.place_agents(self.agents, params['initial_population'])
+        return sim
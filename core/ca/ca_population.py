@@ -0,0 +1,245 @@
+"""Array-backed (structure-of-arrays) storage for CA agent populations."""
+import numpy as np
+
+NO_FAMILY = -1  # family_id column value for agents without a family
+
+# Column name -> dtype. State is float64 so results match plain Python floats.
+COLUMNS = {
+    'id': np.int64,
+    'x': np.int32,
+    'y': np.int32,
+    'age': np.int32,
+    'family_id': np.int32,
+    'panic': np.float64,
+    'stamina': np.float64,
+    'base_speed': np.float64,
+    'resilience': np.float64,
+    'priority_multiplier': np.float64,
+    'evacuated': np.bool_,
+    'last_move_successful': np.bool_,
+    'queued': np.bool_,  # Waiting in an exit queue (see ExitQueues)
+}
+
+
+# (base_speed, resilience, priority_multiplier) per age group
+AGE_GROUP_ATTRIBUTES = np.array([
+    [0.7, 0.3, 1.5],  # Children (< 15): slower, more panic-prone, higher conflict priority
+    [0.6, 0.4, 1.3],  # Elderly (> 65): slower, less resilient
+    [1.0, 0.8, 1.0],  # Young adults (20-40): faster, more resilient
+    [0.9, 0.6, 1.0],  # Others
+])
+
+
+def age_groups(ages):
+    """Get AGE_GROUP_ATTRIBUTES row index for each age."""
+    ages = np.asarray(ages)
+    if ages.ndim == 0:
+        age = int(ages)
+        return 0 if age < 15 else 1 if age > 65 else 2 if 20 <= age <= 40 else 3
+    return np.select([ages < 15, ages > 65, (ages >= 20) & (ages <= 40)], [0, 1, 2], default=3)
+
+
+class AgentPopulation:
+    """Agent state stored as NumPy columns, one row per agent.
+
+    Behaves as a sequence of CAAgent views, so code written against a
+    list of agents keeps working while vectorized code reads the columns
+    (population.x, population.panic, ...) directly.
+
+    Live agents are also kept in a compacted active index (active_rows).
+    Evacuation swap-removes a row from it in O(1), so per-step work can
+    iterate live agents only instead of skipping evacuated ones.
+    """
+
+    def __init__(self, capacity=64):
+        """Initialize empty population with room for capacity agents."""
+        self.size = 0
+        self._capacity = max(1, capacity)
+        self._columns = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._views = []
+
+        # Active index: _active[:active_count] are live rows, _active_pos[row] is
+        # the row's slot in _active (-1 once evacuated)
+        self.active_count = 0
+        self._active = np.zeros(self._capacity, dtype=np.int64)
+        self._active_pos = np.full(self._capacity, -1, dtype=np.int64)
+
+        # Rows in the order they evacuated
+        self.evacuation_order = []
+
+    def add(self, agent_id, x, y, age, family_id=None):
+        """Append one agent row and return its row index."""
+        if self.size == self._capacity:
+            self._grow(self._capacity * 2)
+
+        row = self.size
+        columns = self._columns
+        columns['id'][row] = agent_id
+        columns['x'][row] = x
+        columns['y'][row] = y
+        columns['age'][row] = age
+        columns['family_id'][row] = NO_FAMILY if family_id is None else family_id
+        columns['panic'][row] = 0.0
+        columns['stamina'][row] = 1.0
+        columns['evacuated'][row] = False
+        columns['last_move_successful'][row] = True
+        columns['queued'][row] = False
+        self.size += 1
+        self.init_age_attributes(row)
+        self._activate(row)
+        return row
+
+    @property
+    def active_rows(self):
+        """Rows of live (not evacuated) agents. Order changes as agents evacuate."""
+        return self._active[:self.active_count]
+
+    def active_agents(self):
+        """CAAgent views of live agents, in active_rows order."""
+        return [self._views[row] for row in self.active_rows.tolist()]
+
+    def evacuate(self, rows):
+        """Mark row(s) evacuated and drop them from the active index."""
+        for row in np.atleast_1d(rows).tolist():
+            self.set_evacuated(row, True)
+
+    def set_evacuated(self, row, evacuated):
+        """Set one row's evacuated flag, keeping the active index in sync."""
+        if bool(self._columns['evacuated'][row]) == bool(evacuated):
+            return
+        self._columns['evacuated'][row] = evacuated
+        if evacuated:
+            self._deactivate(row)
+            self.evacuation_order.append(row)
+        else:
+            self._activate(row)
+            self.evacuation_order.remove(row)
+
+    def put(self, rows, state):
+        """Overwrite rows with the given column values and make them live.
+
+        Rows from size upwards are appended (they must follow on from size).
+        Used to move agents between populations without rebuilding them
+        (see ca_distributed); no CAAgent views are created, as in from_state.
+
+        Args:
+            rows: Row indices
+            state: {column: values aligned with rows} for every column in COLUMNS
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return
+        size = max(self.size, int(rows.max()) + 1)
+        if size > self._capacity:
+            self._grow(max(self._capacity * 2, size))
+        self.size = size
+
+        for name in COLUMNS:
+            self._columns[name][rows] = state[name]
+        for row in rows[self._active_pos[rows] < 0].tolist():
+            self._activate(row)
+
+    def release(self, rows):
+        """Drop live row(s) from the active index without recording an evacuation.
+
+        The rows keep their values until put() overwrites them.
+        """
+        for row in np.atleast_1d(rows).tolist():
+            if self._active_pos[row] >= 0:
+                self._deactivate(row)
+
+    def _activate(self, row):
+        """Append row to the active index."""
+        self._active[self.active_count] = row
+        self._active_pos[row] = self.active_count
+        self.active_count += 1
+
+    def _deactivate(self, row):
+        """Swap-remove row from the active index."""
+        slot = self._active_pos[row]
+        last_row = self._active[self.active_count - 1]
+        self._active[slot] = last_row
+        self._active_pos[last_row] = slot
+        self._active_pos[row] = -1
+        self.active_count -= 1
+
+    def get_state(self):
+        """Copy all columns and the active index, e.g. for a checkpoint."""
+        state = {name: self.column(name).copy() for name in COLUMNS}
+        state['active_rows'] = self.active_rows.copy()
+        state['evacuation_order'] = np.array(self.evacuation_order, dtype=np.int64)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a population from get_state output.
+
+        CAAgent views are not created here; attach them with
+        CAAgent.from_row for every row.
+        """
+        size = len(state['id'])
+        population = cls(capacity=size)
+        for name in COLUMNS:
+            population._columns[name][:size] = state[name]
+        population.size = size
+
+        active = np.asarray(state['active_rows'], dtype=np.int64)
+        population.active_count = len(active)
+        population._active[:len(active)] = active
+        population._active_pos[active] = np.arange(len(active))
+        population.evacuation_order = np.asarray(state['evacuation_order']).tolist()
+        return population
+
+    def init_age_attributes(self, rows):
+        """(Re)compute age-derived attributes for the given row(s)."""
+        attributes = AGE_GROUP_ATTRIBUTES[age_groups(self._columns['age'][rows])]
+        self._columns['base_speed'][rows] = attributes[..., 0]
+        self._columns['resilience'][rows] = attributes[..., 1]
+        self._columns['priority_multiplier'][rows] = attributes[..., 2]
+
+    def column(self, name):
+        """Get live view of a column, trimmed to the populated rows."""
+        return self._columns[name][:self.size]
+
+    def _grow(self, capacity):
+        """Reallocate all columns with a larger capacity."""
+        for name, data in self._columns.items():
+            grown = np.zeros(capacity, dtype=data.dtype)
+            grown[:self.size] = data[:self.size]
+            self._columns[name] = grown
+
+        active = np.zeros(capacity, dtype=np.int64)
+        active[:self.active_count] = self.active_rows
+        active_pos = np.full(capacity, -1, dtype=np.int64)
+        active_pos[:self.size] = self._active_pos[:self.size]
+        self._active, self._active_pos = active, active_pos
+        self._capacity = capacity
+
+    def _attach(self, view):
+        """Register the CAAgent view for the most recently added row."""
+        self._views.append(view)
+
+    # Column shortcuts used by vectorized code
+    id = property(lambda self: self.column('id'))
+    x = property(lambda self: self.column('x'))
+    y = property(lambda self: self.column('y'))
+    age = property(lambda self: self.column('age'))
+    family_id = property(lambda self: self.column('family_id'))
+    panic = property(lambda self: self.column('panic'))
+    stamina = property(lambda self: self.column('stamina'))
+    base_speed = property(lambda self: self.column('base_speed'))
+    resilience = property(lambda self: self.column('resilience'))
+    priority_multiplier = property(lambda self: self.column('priority_multiplier'))
+    evacuated = property(lambda self: self.column('evacuated'))  # Read-only use: write via evacuate()
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self._views)
+
+    def __getitem__(self, index):
+        return self._views[index]
+
+    def __repr__(self):
+        return f"AgentPopulation(size={self.size}, evacuated={self.size - self.active_count})"
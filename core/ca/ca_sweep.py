@@ -0,0 +1,115 @@
+"""Parameter sweeps over one layout: shared precomputation, parallel runs, tidy results."""
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from .ca_layout import CALayout
+from .ca_ensemble import SUMMARY_METRICS, init_worker, run_replica, worker_layout
+
+# Parameters that can be swept; closed_exits values are lists of exit cells
+SWEEP_PARAMETERS = ('panic_spread_rate', 'panic_decay_rate', 'initial_population', 'exit_capacity', 'closed_exits')
+
+
+def expand_grid(param_grid):
+    """Expand {parameter: [values]} into the list of all parameter combinations."""
+    unknown = set(param_grid) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}, expected any of {SWEEP_PARAMETERS}")
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+
+
+def format_closed_exits(closed_exits):
+    """Table label for an exit configuration, e.g. '10,0;11,0' ('' if all open)."""
+    return ';'.join(f"{x},{y}" for x, y in sorted(map(tuple, closed_exits)))
+
+
+def _run_worker_point(point_index, replica, point, seed, mode, max_timesteps):
+    """Task entry point inside a worker process."""
+    summary, _ = run_replica(worker_layout(), seed, mode, max_timesteps, **point)
+    row = {'point': point_index, 'replica': replica}
+    for name, value in point.items():
+        row[name] = format_closed_exits(value) if name == 'closed_exits' else value
+    row.update(summary)
+    return row
+
+
+def iter_sweep(layout, param_grid, replicas=1, seed=None, mode='vectorized', max_timesteps=None,
+               max_workers=None):
+    """Run every parameter combination across a process pool, yielding rows as runs finish.
+
+    The layout's exit distance fields are computed once per exit
+    configuration before the pool starts and shipped to each worker
+    once. Replica r of every parameter point uses the same seed, so
+    points are compared under common random numbers.
+
+    Args:
+        layout: CALayout or parsed configuration
+        param_grid: {parameter: [values]}, parameters from SWEEP_PARAMETERS
+        replicas: Runs per parameter point
+        seed: Base seed (default: params['random_seed'] from the layout)
+        mode: Engine mode
+        max_timesteps: Override for params['simulation_steps']
+        max_workers: Worker processes (default: all cores)
+
+    Yields:
+        One dict per run: point, replica, swept parameters, summary metrics
+    """
+    if not isinstance(layout, CALayout):
+        layout = CALayout(layout)
+    points = expand_grid(param_grid)
+
+    # Static precomputation for every exit configuration, done once here
+    for closed_exits in param_grid.get('closed_exits', [()]):
+        layout.get_exit_distance_field(closed_exits)
+
+    if seed is None:
+        seed = layout.params.get('random_seed')
+    seeds = np.random.SeedSequence(seed).spawn(replicas)
+    tasks = [(point_index, replica, point) for point_index, point in enumerate(points) for replica in range(replicas)]
+    max_workers = min(max_workers or os.cpu_count() or 1, max(1, len(tasks)))
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(layout,)) as pool:
+        futures = [pool.submit(_run_worker_point, point_index, replica, point, seeds[replica], mode, max_timesteps)
+                   for point_index, replica, point in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_sweep(layout, param_grid, replicas=1, seed=None, mode='vectorized', max_timesteps=None,
+              max_workers=None, output_path=None):
+    """Run a parameter sweep and collect one tidy row per run.
+
+    Rows are appended to output_path (CSV) as runs finish, so partial
+    results survive an interrupted sweep.
+
+    Args:
+        output_path: Optional CSV file streamed during the sweep
+        (other arguments as for iter_sweep)
+
+    Returns:
+        DataFrame with one row per run, sorted by point and replica
+    """
+    swept = [name for name in SWEEP_PARAMETERS if name in param_grid]
+    columns = ['point', 'replica'] + swept + SUMMARY_METRICS
+
+    rows = []
+    csv_file = open(output_path, 'w', newline='') if output_path else None
+    try:
+        writer = csv.DictWriter(csv_file, fieldnames=columns, extrasaction='ignore') if csv_file else None
+        if writer:
+            writer.writeheader()
+        for row in iter_sweep(layout, param_grid, replicas, seed, mode, max_timesteps, max_workers):
+            rows.append(row)
+            if writer:
+                writer.writerow(row)
+                csv_file.flush()
+    finally:
+        if csv_file:
+            csv_file.close()
+
+    return pd.DataFrame(rows, columns=columns).sort_values(['point', 'replica'], ignore_index=True)
@@ -0,0 +1,147 @@
+"""Batched NumPy implementation of the three CA step stages.
+
+Each function works on all active agents of an AgentPopulation at once and
+mirrors the per-agent reference functions in ca_behaviors exactly, so the
+two engine modes produce identical results from the same StepDraws.
+"""
+import numpy as np
+
+from .ca_grid import CELL_WALL, CELL_EXIT
+from .ca_behaviors import (
+    pick_conflict_winners, CROWD_RADIUS, PANIC_RADIUS, HIGH_PANIC_THRESHOLD, RANDOM_CHOICE_PROB,
+    HIGH_PANIC_RANDOM_CHOICE_PROB, TIEBREAK_SCALE, PANIC_DECAY_RATE,
+)
+
+# 8-neighbourhood offsets, in the same order as CAGrid.get_neighbors_8
+NEIGHBOR_DX = np.array([-1, -1, -1, 0, 0, 1, 1, 1])
+NEIGHBOR_DY = np.array([-1, 0, 1, -1, 1, -1, 0, 1])
+
+
+def select_next_cells(rows, population, environment, grid, draws):
+    """Choose a target cell for every agent row in rows.
+
+    Gathers the 8 neighbour scores into an (N, 8) array, then makes the
+    greedy/random choice for all agents with one pass over the draws.
+
+    Returns:
+        (target_x, target_y) int arrays aligned with rows
+    """
+    x = population.x[rows]
+    y = population.y[rows]
+    panic = population.panic[rows]
+
+    nx = x[:, None] + NEIGHBOR_DX
+    ny = y[:, None] + NEIGHBOR_DY
+    in_bounds = (nx >= 0) & (nx < grid.width) & (ny >= 0) & (ny < grid.height)
+    cells = np.clip(nx, 0, grid.width - 1) * grid.height + np.clip(ny, 0, grid.height - 1)
+    walkable = in_bounds & (grid.static_layer.ravel()[cells] != CELL_WALL)
+
+    # Same terms and operation order as calculate_cell_attractiveness
+    exit_attraction = -environment.get_exit_distance_field().ravel()[cells]
+    crowding_penalty = -environment.get_density_field(CROWD_RADIUS).ravel()[cells] * 2.0
+    scores = exit_attraction + crowding_penalty + panic[:, None] * 1.0
+    scores = np.where(walkable, scores, -np.inf)
+
+    # Greedy: first best walkable neighbour (stable, like the reference sort)
+    best = np.argmax(scores, axis=1)
+    no_finite_score = np.isneginf(scores[np.arange(len(rows)), best])
+    best[no_finite_score] = np.argmax(walkable[no_finite_score], axis=1)
+
+    # Exploration: k-th walkable neighbour for a uniform k
+    n_walkable = walkable.sum(axis=1)
+    k = np.minimum((draws.pick[rows] * n_walkable).astype(np.int64), n_walkable - 1)
+    random_pick = np.argmax(walkable & (np.cumsum(walkable, axis=1) == (k + 1)[:, None]), axis=1)
+
+    random_choice_prob = np.where(panic > HIGH_PANIC_THRESHOLD, HIGH_PANIC_RANDOM_CHOICE_PROB, RANDOM_CHOICE_PROB)
+    choice = np.where(draws.explore[rows] < random_choice_prob, random_pick, best)
+
+    target_x = nx[np.arange(len(rows)), choice]
+    target_y = ny[np.arange(len(rows)), choice]
+
+    # No walkable neighbour, or waiting in an exit queue: stay in place
+    stuck = (n_walkable == 0) | population.column('queued')[rows]
+    target_x[stuck] = x[stuck]
+    target_y[stuck] = y[stuck]
+    return target_x, target_y
+
+
+def resolve_conflicts(rows, target_x, target_y, population, grid, draws):
+    """Pick one winner per target cell among the claiming rows.
+
+    Returns:
+        Boolean array aligned with rows, True where the agent won its cell
+    """
+    cells = target_x.astype(np.int64) * grid.height + target_y
+    priority = population.priority_multiplier[rows] + population.panic[rows] * 0.5
+    priority = np.where(population.column('queued')[rows], np.inf, priority)  # Queued agents keep their cell
+    priority = priority + draws.jitter[rows] * TIEBREAK_SCALE
+    return pick_conflict_winners(cells, priority, rows)
+
+
+def update_panic(rows, population, environment, panic_spread_rate, panic_decay_rate):
+    """Update panic of rows from their neighbourhood, same arithmetic as CAAgent.update_panic/decay_panic."""
+    panic_field = environment.get_panic_average_field(population, radius=PANIC_RADIUS)
+    nearby_panic = panic_field[population.x[rows], population.y[rows]] * panic_spread_rate
+    susceptibility = 1.0 - population.resilience[rows]
+    panic = np.minimum(1.0, population.panic[rows] + nearby_panic * susceptibility)
+    population.panic[rows] = np.maximum(0.0, panic - panic_decay_rate)
+
+
+def execute_moves(rows, new_x, new_y, population, grid, environment,
+                  panic_spread_rate=1.0, panic_decay_rate=PANIC_DECAY_RATE, exits=None,
+                  panic_update=update_panic):
+    """Apply resolved positions for rows, evacuate agents on exits, update panic.
+
+    With a limited-capacity exits (ExitQueues), agents reaching an exit
+    queue at their door instead, and leave as the doors release them.
+    panic_update is the panic stage, e.g. a ca_kernels version.
+
+    Returns:
+        List of newly evacuated agent ids (in the order of rows, or in
+        release order when queueing)
+    """
+    old_x = population.x[rows]
+    old_y = population.y[rows]
+    queueing = exits is not None and exits.limited
+
+    # Evacuation
+    on_exit = grid.static_layer[new_x, new_y] == CELL_EXIT
+    queue_arrivals = rows[on_exit & ~population.column('queued')[rows]] if queueing else rows[:0]
+    if queueing:
+        on_exit = np.zeros(len(rows), dtype=bool)
+    evacuated_rows = rows[on_exit]
+    evacuated_ids = population.id[evacuated_rows].tolist()
+    if exits is not None:
+        exits.count_evacuated(new_x[on_exit], new_y[on_exit], grid.height)
+    population.evacuate(evacuated_rows)
+    for agent_id in evacuated_ids:
+        grid.remove_agent(agent_id)
+
+    # Movement for agents still on the grid
+    staying = ~on_exit
+    rows, old_x, old_y, new_x, new_y = rows[staying], old_x[staying], old_y[staying], new_x[staying], new_y[staying]
+    moved = (new_x != old_x) | (new_y != old_y)
+    moved_rows = rows[moved]
+
+    grid.apply_moves(population.id[moved_rows], old_x[moved], old_y[moved], new_x[moved], new_y[moved])
+    population.x[moved_rows] = new_x[moved]
+    population.y[moved_rows] = new_y[moved]
+    population.stamina[moved_rows] = np.maximum(0.0, population.stamina[moved_rows] - 0.01)
+    population.column('last_move_successful')[rows] = moved
+
+    if queueing:
+        # New arrivals join the back of their door queues, then doors release
+        exits.enqueue(queue_arrivals, exits.doors_at(population.x[queue_arrivals], population.y[queue_arrivals],
+                                                     grid.height), population)
+        released = exits.release(population, grid.height)
+        evacuated_ids = population.id[released].tolist()
+        population.evacuate(released)
+        for agent_id in evacuated_ids:
+            grid.remove_agent(agent_id)
+        rows = rows[~population.evacuated[rows]]
+
+    # Synchronous panic update
+    if len(rows):
+        panic_update(rows, population, environment, panic_spread_rate, panic_decay_rate)
+
+    return evacuated_ids
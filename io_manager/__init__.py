@@ -1,10 +1,11 @@
 """I/O module for Excel and CSV operations."""
 from .excel_parser import parse_excel_config, create_empty_config_template
-from .excel_writer import ExcelWriter, create_output_workbook
+from .excel_writer import ExcelWriter, StreamingExcelWriter, create_output_workbook
 
 __all__ = [
     'parse_excel_config',
     'create_empty_config_template',
     'ExcelWriter',
+    'StreamingExcelWriter',
     'create_output_workbook',
 ]
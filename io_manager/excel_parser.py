@@ -1,5 +1,7 @@
 """Parse museum configuration from Excel file."""
 import os
+import numpy as np
+import pandas as pd
 from openpyxl import load_workbook
 from core.ca.ca_grid import (
     CELL_EMPTY, CELL_PERSON, CELL_WALL, CELL_EXIT,
@@ -7,19 +9,37 @@ from core.ca.ca_grid import (
 )
 
 
+# Parameter name -> (type, default), in template order
+PARAMETER_DEFAULTS = {
+    'simulation_steps': (int, 1000),
+    'initial_population': (int, 75),
+    'panic_spread_rate': (float, 0.05),
+    'panic_decay_rate': (float, 0.01),
+    'crowding_threshold': (int, 5),
+    'random_seed': (int, None),     # Blank: fresh seed each run
+    'exit_capacity': (int, None),   # Agents per step per door; blank: unlimited
+}
+
+
 def parse_excel_config(filepath):
     """Parse Excel configuration file and return grid, agent positions, and parameters.
 
     Expected Excel structure:
-    - Sheet "Config": 100×100 grid with cell type values (0-7)
-    - Parameters in rows 102-110
+    - Sheet "Config": width×height grid with cell type values (0-7), any size
+    - Parameter block below the grid, one blank row after it: values in
+      column A, names in column B (see PARAMETER_DEFAULTS). The block is found by
+      its labels, so the grid extent follows from where it starts.
     - Optional sheet "InitialState" for manual agent placement
 
+    The workbook is streamed in read-only mode, one pass over the rows,
+    each row going straight into a NumPy array; the extent comes from the
+    cells actually present, not from the file's recorded dimensions.
+
     Returns:
         {
-            'grid_data': 2D list of cell types,
-            'width': 100,
-            'height': 100,
+            'grid_data': 2D uint8 array of cell types, indexed [x, y],
+            'width': grid width,
+            'height': grid height,
             'agents': list of (x, y, age, family_id),
             'params': {'simulation_steps': int, 'initial_population': int, ...}
         }
@@ -27,48 +47,51 @@ def parse_excel_config(filepath):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Config file not found: {filepath}")
 
-    wb = load_workbook(filepath)
+    wb = load_workbook(filepath, read_only=True, data_only=True)
 
     if 'Config' not in wb.sheetnames:
         raise ValueError("Excel file must have 'Config' sheet")
 
     ws = wb['Config']
-
-    # Parse grid (100×100)
-    width, height = 100, 100
-    grid_data = []
-
-    for x in range(1, width + 1):
-        column = []
-        for y in range(1, height + 1):
-            cell = ws.cell(row=y, column=x)
-            value = cell.value if cell.value is not None else 0
-            try:
-                column.append(int(value))
-            except (ValueError, TypeError):
-                column.append(0)  # Default to empty
-        grid_data.append(column)
-
-    # Parse parameters from rows 102-110
-    params = {
-        'simulation_steps': int(ws.cell(row=102, column=1).value or 1000),
-        'initial_population': int(ws.cell(row=103, column=1).value or 75),
-        'panic_spread_rate': float(ws.cell(row=104, column=1).value or 0.05),
-        'panic_decay_rate': float(ws.cell(row=105, column=1).value or 0.01),
-        'crowding_threshold': int(ws.cell(row=106, column=1).value or 5),
-    }
+    ws.reset_dimensions()  # Trust the cells, not the stored used range
+
+    # One pass: every row as a float array (NaN for blank/non-numeric cells),
+    # and the parameter block located by its labels in column B
+    rows = []  # (values, number of columns up to the last non-blank cell)
+    param_values = {}
+    first_param_row = None
+    for row, cells in enumerate(ws.iter_rows(values_only=True), start=1):
+        label = cells[1] if len(cells) > 1 else None
+        if isinstance(label, str) and label.strip() in PARAMETER_DEFAULTS:
+            param_values[label.strip()] = cells[0]
+            first_param_row = first_param_row or row
+        rows.append(_row_values(cells))
+
+    non_blank = [row for row, (_, extent) in enumerate(rows, start=1) if extent]
+    height = first_param_row - 2 if first_param_row else (non_blank[-1] if non_blank else 0)
+    width = max((extent for _, extent in rows[:max(height, 0)]), default=0)
+    if height < 1 or width < 1:
+        raise ValueError("Config sheet has no grid")
+
+    # Parse grid: one sheet row per y, one column per x
+    grid = np.zeros((height, width))
+    for y, (values, extent) in enumerate(rows[:height]):
+        grid[y, :extent] = values[:extent]
+    grid_data = np.nan_to_num(grid, nan=0).astype(np.uint8).T.copy()  # Non-numeric cells count as empty
+
+    # Parse parameters next to their labels (defaults for missing ones)
+    params = {}
+    for name, (convert, default) in PARAMETER_DEFAULTS.items():
+        value = param_values.get(name)
+        params[name] = default if value is None or value == '' else convert(value)
 
     # Parse agent initial positions from "InitialState" sheet if present
     agents = []
     if 'InitialState' in wb.sheetnames:
         ws_init = wb['InitialState']
-        for row in range(2, ws_init.max_row + 1):  # Skip header
-            agent_id = ws_init.cell(row=row, column=1).value
-            x = ws_init.cell(row=row, column=2).value
-            y = ws_init.cell(row=row, column=3).value
-            age = ws_init.cell(row=row, column=4).value
-            family_id = ws_init.cell(row=row, column=5).value
-
+        ws_init.reset_dimensions()
+        for cells in ws_init.iter_rows(min_row=2, values_only=True):  # Skip header
+            agent_id, x, y, age, family_id = (tuple(cells) + (None,) * 5)[:5]
             if agent_id and x and y:
                 agents.append({
                     'id': int(agent_id),
@@ -89,8 +112,26 @@ def parse_excel_config(filepath):
     }
 
 
+def _row_values(cells):
+    """Convert one sheet row to floats.
+
+    Returns:
+        (float array with NaN for blank or non-numeric cells,
+         number of columns up to the last non-blank cell)
+    """
+    try:
+        values = np.array(cells, dtype=float)  # Blank cells (None) become NaN
+        filled = ~np.isnan(values)
+    except (TypeError, ValueError):
+        # Text cells in the row: numeric strings convert, other text counts as empty
+        values = pd.to_numeric(pd.Series(cells, dtype=object), errors='coerce').to_numpy(dtype=float)
+        filled = np.array([cell is not None for cell in cells], dtype=bool)
+    present = np.flatnonzero(filled)
+    return values, int(present[-1]) + 1 if present.size else 0
+
+
 def create_empty_config_template(filepath, width=100, height=100):
-    """Create an empty Excel template with 100×100 grid."""
+    """Create an empty Excel template with a width×height grid."""
     from openpyxl import Workbook
     from openpyxl.styles import PatternFill
 
@@ -98,24 +139,16 @@ def create_empty_config_template(filepath, width=100, height=100):
     ws = wb.active
     ws.title = "Config"
 
-    # Initialize grid with zeros (empty cells)
-    for x in range(1, width + 1):
-        for y in range(1, height + 1):
-            ws.cell(row=y, column=x).value = 0
-
-    # Add parameter labels and default values
-    ws.cell(row=102, column=1).value = 1000  # simulation_steps
-    ws.cell(row=103, column=1).value = 75    # initial_population
-    ws.cell(row=104, column=1).value = 0.05  # panic_spread_rate
-    ws.cell(row=105, column=1).value = 0.01  # panic_decay_rate
-    ws.cell(row=106, column=1).value = 5     # crowding_threshold
-
-    # Add parameter labels in column B
-    ws.cell(row=102, column=2).value = "simulation_steps"
-    ws.cell(row=103, column=2).value = "initial_population"
-    ws.cell(row=104, column=2).value = "panic_spread_rate"
-    ws.cell(row=105, column=2).value = "panic_decay_rate"
-    ws.cell(row=106, column=2).value = "crowding_threshold"
+    # Initialize grid with zeros (empty cells), one row per y
+    empty_row = [0] * width
+    for _ in range(height):
+        ws.append(empty_row)
+
+    # Parameter block after one blank row: value in column A, label in column B.
+    # random_seed and exit_capacity stay blank: fresh seed each run, unlimited exit flow
+    ws.append([])
+    for name, (_, default) in PARAMETER_DEFAULTS.items():
+        ws.append([default, name])
 
     # Create InitialState sheet
     ws_init = wb.create_sheet("InitialState")
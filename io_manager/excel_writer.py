@@ -1,13 +1,68 @@
 """Write simulation results to Excel file."""
 import os
+import numpy as np
+import pandas as pd
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import NamedStyle, PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+from analysis.ca_logger import LOG_MODES, DeltaFilter, agent_block, logged_panic, population_block
+from core.ca.ca_population import AgentPopulation
 from core.ca.ca_grid import (
     CELL_EMPTY, CELL_PERSON, CELL_WALL, CELL_EXIT,
     CELL_ENTRANCE, CELL_EXHIBIT, CELL_EXHIBIT_SPECIAL, CELL_SECURITY
 )
 
 
+# Fill colour per cell type in snapshot sheets
+CELL_COLORS = {
+    CELL_EMPTY: "FFFFFF",        # White
+    CELL_PERSON: "0070C0",       # Blue
+    CELL_WALL: "000000",         # Black
+    CELL_EXIT: "70AD47",         # Green
+    CELL_ENTRANCE: "FFC000",     # Yellow
+    CELL_EXHIBIT: "FF7030",      # Orange
+    CELL_EXHIBIT_SPECIAL: "FF00FF",  # Magenta
+    CELL_SECURITY: "C55A11",     # Brown
+}
+
+# Cell types drawn with white text (dark backgrounds)
+DARK_CELL_TYPES = [CELL_WALL, CELL_EXHIBIT_SPECIAL]
+
+# Agent trajectory sheet columns
+TRAJECTORY_HEADERS = ["Timestep", "AgentID", "X", "Y", "PanicLevel", "Evacuated", "Age"]
+
+EXCEL_MAX_ROWS = 1048576  # Rows per worksheet in .xlsx
+
+
+def _summary_rows(simulation_stats):
+    """(metric, value) rows of the Summary sheet."""
+    return [
+        ("Total Timesteps", simulation_stats.get('total_timesteps', 0)),
+        ("Total Agents", simulation_stats.get('total_agents', 0)),
+        ("Evacuated Agents", simulation_stats.get('evacuated_agents', 0)),
+        ("Evacuation Rate (%)",
+         (simulation_stats.get('evacuated_agents', 0) / max(1, simulation_stats.get('total_agents', 1))) * 100),
+        ("Average Panic Level", round(simulation_stats.get('avg_panic_final', 0.0), 3)),
+        ("Max Panic Level", round(simulation_stats.get('max_panic_final', 0.0), 3)),
+        ("Average Stamina Final", round(simulation_stats.get('avg_stamina_final', 1.0), 3)),
+    ]
+
+
+def simulation_summary(simulation):
+    """Summary statistics of a finished simulation for the Summary sheet."""
+    agents = simulation.agents
+    return {
+        'total_timesteps': simulation.timestep,
+        'total_agents': len(agents),
+        'evacuated_agents': len(simulation.evacuated_agents),
+        'avg_panic_final': float(agents.panic.mean()) if len(agents) else 0.0,
+        'max_panic_final': float(agents.panic.max()) if len(agents) else 0.0,
+        'avg_stamina_final': float(agents.stamina.mean()) if len(agents) else 1.0,
+    }
+
+
 class ExcelWriter:
     """Write CA simulation results to Excel workbook."""
 
@@ -22,11 +77,7 @@ class ExcelWriter:
     def add_config_sheet(self, grid_data):
         """Add initial config sheet to workbook."""
         ws = self.wb.create_sheet("Config", 0)
-
-        for x in range(self.width):
-            for y in range(self.height):
-                cell_value = grid_data[x][y] if x < len(grid_data) and y < len(grid_data[x]) else 0
-                ws.cell(row=y + 1, column=x + 1).value = cell_value
+        self._append_grid(ws, grid_data)
 
     def add_timestep_snapshot(self, timestep, grid_snapshot, skip_interval=100):
         """Add timestep snapshot sheet (every skip_interval steps).
@@ -41,39 +92,41 @@ class ExcelWriter:
 
         sheet_name = f"Timestep_{timestep:04d}"
         ws = self.wb.create_sheet(sheet_name)
+        self._append_grid(ws, grid_snapshot)
 
-        for x in range(self.width):
-            for y in range(self.height):
-                cell_value = grid_snapshot[x][y] if x < len(grid_snapshot) and y < len(grid_snapshot[x]) else 0
-                cell = ws.cell(row=y + 1, column=x + 1)
-                cell.value = cell_value
-
-                # Color cells by type
-                self._color_cell(cell, cell_value)
+        # Color cells by type: one conditional format per type for the whole grid
+        grid_range = f"A1:{get_column_letter(self.width)}{self.height}"
+        for cell_type, color in CELL_COLORS.items():
+            font = Font(color="FFFFFF") if cell_type in DARK_CELL_TYPES else None
+            ws.conditional_formatting.add(grid_range, CellIsRule(
+                operator='equal', formula=[str(cell_type)],
+                fill=PatternFill(start_color=color, end_color=color, fill_type="solid"), font=font))
 
     def add_agent_trajectories(self, logger_data):
-        """Add agent trajectories sheet."""
+        """Add agent trajectories sheet.
+
+        Args:
+            logger_data: DataFrame of agent records (CALogger.to_dataframe)
+                or list of record dicts
+        """
         ws = self.wb.create_sheet("AgentTrajectories")
 
         # Headers
-        ws['A1'] = "Timestep"
-        ws['B1'] = "AgentID"
-        ws['C1'] = "X"
-        ws['D1'] = "Y"
-        ws['E1'] = "PanicLevel"
-        ws['F1'] = "Evacuated"
-        ws['G1'] = "Age"
+        ws.append(TRAJECTORY_HEADERS)
 
-        row = 2
-        for record in logger_data:
-            ws.cell(row=row, column=1).value = record['timestep']
-            ws.cell(row=row, column=2).value = record['agent_id']
-            ws.cell(row=row, column=3).value = record['x']
-            ws.cell(row=row, column=4).value = record['y']
-            ws.cell(row=row, column=5).value = round(record['panic_level'], 3)
-            ws.cell(row=row, column=6).value = record['evacuated']
-            ws.cell(row=row, column=7).value = record['age']
-            row += 1
+        if isinstance(logger_data, pd.DataFrame):
+            # Column by column: no per-record dicts
+            panic = [round(value, 3) for value in logger_data['panic_level'].to_numpy(dtype=float).tolist()]
+            rows = zip(logger_data['timestep'].tolist(), logger_data['agent_id'].tolist(),
+                       logger_data['x'].tolist(), logger_data['y'].tolist(), panic,
+                       logger_data['evacuated'].tolist(), logger_data['age'].tolist())
+        else:
+            rows = ((record['timestep'], record['agent_id'], record['x'], record['y'],
+                     round(record['panic_level'], 3), record['evacuated'], record['age'])
+                    for record in logger_data)
+
+        for row in rows:
+            ws.append(list(row))
 
         # Auto-width columns
         for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
@@ -86,19 +139,8 @@ class ExcelWriter:
         ws['A1'] = "Metric"
         ws['B1'] = "Value"
 
-        metrics = [
-            ("Total Timesteps", simulation_stats.get('total_timesteps', 0)),
-            ("Total Agents", simulation_stats.get('total_agents', 0)),
-            ("Evacuated Agents", simulation_stats.get('evacuated_agents', 0)),
-            ("Evacuation Rate (%)",
-             (simulation_stats.get('evacuated_agents', 0) / max(1, simulation_stats.get('total_agents', 1))) * 100),
-            ("Average Panic Level", round(simulation_stats.get('avg_panic_final', 0.0), 3)),
-            ("Max Panic Level", round(simulation_stats.get('max_panic_final', 0.0), 3)),
-            ("Average Stamina Final", round(simulation_stats.get('avg_stamina_final', 1.0), 3)),
-        ]
-
         row = 2
-        for metric_name, value in metrics:
+        for metric_name, value in _summary_rows(simulation_stats):
             ws.cell(row=row, column=1).value = metric_name
             ws.cell(row=row, column=2).value = value
             row += 1
@@ -112,25 +154,180 @@ class ExcelWriter:
         self.wb.save(filepath)
         self.wb.close()
 
-    def _color_cell(self, cell, cell_type):
-        """Apply color to cell based on type."""
-        colors = {
-            CELL_EMPTY: "FFFFFF",        # White
-            CELL_PERSON: "0070C0",       # Blue
-            CELL_WALL: "000000",         # Black
-            CELL_EXIT: "70AD47",         # Green
-            CELL_ENTRANCE: "FFC000",     # Yellow
-            CELL_EXHIBIT: "FF7030",      # Orange
-            CELL_EXHIBIT_SPECIAL: "FF00FF",  # Magenta
-            CELL_SECURITY: "C55A11",     # Brown
-        }
+    def _append_grid(self, ws, grid):
+        """Write a [x, y] grid to an empty sheet, one sheet row per y."""
+        values = np.zeros((self.width, self.height), dtype=np.int64)
+        grid = np.asarray(grid)
+        values[:grid.shape[0], :grid.shape[1]] = grid[:self.width, :self.height]
+        for row in values.T.tolist():
+            ws.append(row)
+
+
+class StreamingExcelWriter:
+    """Write-only Excel export that streams rows while the simulation runs.
+
+    Pass it to CASimulation.run as a logger, next to the CALogger that
+    keeps the records for analysis; it only implements log_step and
+    close. Each log_step appends that step's agent records, chosen as by
+    CALogger's log modes, to the trajectory sheet right away; openpyxl's
+    write-only mode keeps them in temporary files rather than in memory.
+    A sheet that reaches Excel's row limit continues in
+    AgentTrajectories_2, _3, ... Grid snapshots are styled with one shared
+    named style per cell type instead of a fill per cell.
+
+    Call close() after the run to add the Summary sheet and save.
+    """
+
+    def __init__(self, output_path, static_layer, snapshot_interval=None, mode='full', tolerance=1e-3,
+                 max_rows=EXCEL_MAX_ROWS):
+        """Initialize streaming writer and write the Config sheet.
+
+        Args:
+            output_path: .xlsx file written by close()
+            static_layer: Grid cell types, indexed [x, y]
+            snapshot_interval: Add a Timestep_NNNN sheet every this many steps (None: no snapshots)
+            mode, tolerance: Log mode, see CALogger
+            max_rows: Rows per trajectory sheet, header included
+        """
+        if mode not in LOG_MODES:
+            raise ValueError(f"Unknown log mode '{mode}', expected one of {LOG_MODES}")
+        self.output_path = output_path
+        self.width, self.height = np.shape(static_layer)
+        self.snapshot_interval = snapshot_interval
+        self.mode = mode
+        self.max_rows = max_rows
+        self.rows_written = 0  # Agent records written
+        self.closed = False
 
-        color = colors.get(cell_type, "FFFFFF")
-        cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        # 'full' mode: final records of evacuated agents, one block per step they
+        # evacuated in, repeated every step; 'delta' mode: rows worth writing
+        self._frozen_blocks = []
+        self._frozen_count = 0  # Entries of population.evacuation_order already seen
+        self._delta = DeltaFilter(tolerance)
 
-        # Adjust text color for dark backgrounds
-        if cell_type in [CELL_WALL, CELL_EXHIBIT_SPECIAL]:
-            cell.font = Font(color="FFFFFF")
+        self.wb = Workbook(write_only=True)
+        self.wb.add_named_style(NamedStyle("ca_header", font=Font(bold=True)))
+        for cell_type, color in CELL_COLORS.items():
+            self.wb.add_named_style(NamedStyle(
+                f"ca_cell_{cell_type}",
+                fill=PatternFill(start_color=color, end_color=color, fill_type="solid"),
+                font=Font(color="FFFFFF") if cell_type in DARK_CELL_TYPES else Font(),
+                alignment=Alignment(horizontal="center")))
+
+        ws = self.wb.create_sheet("Config")
+        for row in np.asarray(static_layer, dtype=np.int64).T.tolist():
+            ws.append(row)
+
+        self.trajectory_sheets = []
+        self.summary_sheet = None
+        self._sheet_rows = 0  # Rows in the current trajectory sheet
+        self._new_trajectory_sheet()
+
+    def _new_trajectory_sheet(self):
+        """Start the next trajectory sheet with its header row."""
+        index = len(self.trajectory_sheets) + 1
+        ws = self.wb.create_sheet("AgentTrajectories" if index == 1 else f"AgentTrajectories_{index}")
+        for col in range(1, len(TRAJECTORY_HEADERS) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 12
+        ws.append([self._styled(ws, header, "ca_header") for header in TRAJECTORY_HEADERS])
+        self.trajectory_sheets.append(ws)
+        self._sheet_rows = 1
+
+    @staticmethod
+    def _styled(ws, value, style):
+        """Write-only cell with a named style."""
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    def log_step(self, timestep, agents, grid, statistics):
+        """Write a step's agent records and add a grid snapshot sheet when due.
+
+        Args:
+            timestep: Current simulation step
+            agents: AgentPopulation or list of CAAgent instances ('full' mode only)
+            grid: CAGrid instance
+            statistics: Dict of current statistics (not written)
+        """
+        if self.closed:
+            raise RuntimeError("StreamingExcelWriter is closed")
+
+        if isinstance(agents, AgentPopulation):
+            newly_evacuated = np.array(agents.evacuation_order[self._frozen_count:], dtype=np.int64)
+            self._frozen_count = len(agents.evacuation_order)
+            if self.mode == 'full':
+                if newly_evacuated.size:
+                    self._frozen_blocks.append(population_block(agents, newly_evacuated))
+                blocks = [population_block(agents, agents.active_rows), *self._frozen_blocks]
+            else:
+                rows = agents.active_rows
+                if self.mode == 'delta':
+                    rows = rows[self._delta.changed(agents, rows)]
+                blocks = [population_block(agents, rows)]
+                if newly_evacuated.size:
+                    blocks.append(population_block(agents, newly_evacuated))
+        else:
+            if self.mode != 'full':
+                raise ValueError(f"Log mode '{self.mode}' needs an AgentPopulation")
+            blocks = [agent_block(agents)]
+
+        for block in blocks:
+            self._write_records(timestep, block)
+
+        if self.snapshot_interval and timestep % self.snapshot_interval == 0:
+            self.add_timestep_snapshot(timestep, grid.get_grid_snapshot())
+
+    def _write_records(self, timestep, block):
+        """Write a block of agent records as trajectory rows."""
+        rows = zip(np.asarray(block['agent_id']).tolist(), np.asarray(block['x']).tolist(),
+                   np.asarray(block['y']).tolist(), logged_panic(block).round(3).tolist(),
+                   np.asarray(block['evacuated'], dtype=bool).tolist(), np.asarray(block['age']).tolist())
+
+        timestep = int(timestep)
+        ws = self.trajectory_sheets[-1]
+        for agent_id, x, y, panic_level, evacuated, age in rows:
+            if self._sheet_rows >= self.max_rows:
+                self._new_trajectory_sheet()
+                ws = self.trajectory_sheets[-1]
+            ws.append([timestep, agent_id, x, y, panic_level, evacuated, age])
+            self._sheet_rows += 1
+            self.rows_written += 1
+
+    def add_timestep_snapshot(self, timestep, grid_snapshot):
+        """Add a Timestep_NNNN sheet with cells styled by cell type."""
+        ws = self.wb.create_sheet(f"Timestep_{timestep:04d}")
+        styles = {cell_type: f"ca_cell_{cell_type}" for cell_type in CELL_COLORS}
+        for row in np.asarray(grid_snapshot, dtype=np.int64).T.tolist():
+            ws.append([self._styled(ws, value, styles[value]) if value in styles else value for value in row])
+
+    def add_summary_sheet(self, simulation_stats):
+        """Add summary statistics sheet."""
+        ws = self.wb.create_sheet("Summary")
+        ws.column_dimensions['A'].width = 25
+        ws.column_dimensions['B'].width = 15
+        ws.append([self._styled(ws, "Metric", "ca_header"), self._styled(ws, "Value", "ca_header")])
+        for metric_name, value in _summary_rows(simulation_stats):
+            ws.append([metric_name, value])
+        self.summary_sheet = ws
+
+    def close(self, simulation=None):
+        """Add the Summary sheet (if simulation is given) and save the workbook.
+
+        Sheets are saved as Config, trajectory sheets, Summary, snapshots.
+        """
+        if self.closed:
+            return
+        if simulation is not None:
+            self.add_summary_sheet(simulation_summary(simulation))
+
+        # Snapshot sheets were created while the trajectory sheets were still growing
+        sheets = self.trajectory_sheets + ([self.summary_sheet] if self.summary_sheet is not None else [])
+        for position, ws in enumerate(sheets, start=1):
+            self.wb.move_sheet(ws.title, position - self.wb.index(ws))
+
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        self.wb.save(self.output_path)
+        self.closed = True
 
 
 def create_output_workbook(simulation, logger_data, output_path):
@@ -138,7 +335,7 @@ def create_output_workbook(simulation, logger_data, output_path):
 
     Args:
         simulation: CASimulation instance
-        logger_data: List of agent trajectory records from logger
+        logger_data: Agent trajectory DataFrame (CALogger.to_dataframe) or list of records
         output_path: Path to save Excel file
     """
     writer = ExcelWriter(simulation.width, simulation.height)
@@ -150,15 +347,7 @@ def create_output_workbook(simulation, logger_data, output_path):
     writer.add_agent_trajectories(logger_data)
 
     # Add summary statistics
-    stats = {
-        'total_timesteps': simulation.timestep,
-        'total_agents': len(simulation.agents),
-        'evacuated_agents': len(simulation.evacuated_agents),
-        'avg_panic_final': sum(a.panic_level for a in simulation.agents) / len(simulation.agents) if simulation.agents else 0.0,
-        'max_panic_final': max((a.panic_level for a in simulation.agents), default=0.0),
-        'avg_stamina_final': sum(a.stamina for a in simulation.agents) / len(simulation.agents) if simulation.agents else 1.0,
-    }
-    writer.add_summary_sheet(stats)
+    writer.add_summary_sheet(simulation_summary(simulation))
 
     # Save
     writer.save(output_path)
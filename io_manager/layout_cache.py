@@ -0,0 +1,143 @@
+"""Compiled layout cache: parsed Excel layouts and their fields, keyed by workbook content."""
+import hashlib
+import json
+import os
+import struct
+import zipfile
+import numpy as np
+from core.ca.ca_layout import CALayout
+from io_manager.excel_parser import parse_excel_config
+
+CACHE_VERSION = 1  # Bump when the cached contents or the parser output change
+AGENT_FIELDS = ('id', 'x', 'y', 'age', 'family_id')
+MISSING = -1  # Stored for age/family_id None in the spawn list
+
+
+def workbook_hash(filepath):
+    """SHA-256 of the workbook's bytes."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(filepath, cache_dir):
+    """Cache file for a workbook: named after the workbook, keyed by its content hash."""
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(cache_dir, f"{name}-v{CACHE_VERSION}-{workbook_hash(filepath)[:24]}.npz")
+
+
+def save_layout(layout, path):
+    """Save a layout with its default exit and wall distance fields.
+
+    Arrays are stored uncompressed so load_cached_layout can memory-map them.
+    The file is written under a temporary name and then renamed, so a run
+    that is interrupted never leaves a truncated cache behind.
+
+    Args:
+        layout: CALayout
+        path: Output .npz file
+    """
+    agents = np.array([[MISSING if agent.get(field) is None else agent[field] for field in AGENT_FIELDS]
+                       for agent in layout.agents], dtype=np.int64).reshape(-1, len(AGENT_FIELDS))
+    arrays = {
+        'static_layer': layout.static_layer,
+        'params': np.frombuffer(json.dumps(layout.params).encode('utf-8'), dtype=np.uint8),
+        'agents': agents,
+        'exit_distance': layout.get_exit_distance_field(),
+        'wall_distance': layout.get_wall_distance_field(),
+    }
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+
+def load_cached_layout(path):
+    """Load a layout saved by save_layout, with its fields memory-mapped.
+
+    Returns:
+        CALayout with the cached exit and wall distance fields already set
+    """
+    arrays = _mmap_npz(path)
+    width, height = arrays['static_layer'].shape
+    agents = [{field: (None if field in ('age', 'family_id') and value == MISSING else value)
+               for field, value in zip(AGENT_FIELDS, row)}
+              for row in arrays['agents'].tolist()]
+    layout = CALayout({
+        'width': width,
+        'height': height,
+        'grid_data': arrays['static_layer'],
+        'params': json.loads(arrays['params'].tobytes().decode('utf-8')),
+        'agents': agents,
+    })
+    layout.set_exit_distance_field(arrays['exit_distance'])
+    layout.set_wall_distance_field(arrays['wall_distance'])
+    return layout
+
+
+def load_layout(filepath, cache_dir):
+    """Load a layout workbook through the cache.
+
+    On a hit the layout comes straight from the cache file; on a miss the
+    workbook is parsed, its fields are computed, and the result is cached.
+    Any edit to the workbook changes its hash and so misses the cache.
+
+    Args:
+        filepath: Excel configuration file
+        cache_dir: Directory for cache files (None disables the cache)
+
+    Returns:
+        (CALayout, True if it came from the cache)
+    """
+    if cache_dir is None:
+        return CALayout(parse_excel_config(filepath)), False
+
+    path = cache_path(filepath, cache_dir)
+    if os.path.exists(path):
+        try:
+            return load_cached_layout(path), True
+        except (OSError, ValueError, KeyError):
+            pass  # Unreadable cache file: rebuild it below
+
+    layout = CALayout(parse_excel_config(filepath))
+    save_layout(layout, path)
+    return layout, False
+
+
+def _mmap_npz(path):
+    """Memory-map every array of an uncompressed .npz file.
+
+    np.load cannot memory-map arrays inside an .npz archive, but stored
+    (uncompressed) members are plain .npy files at known offsets.
+
+    Returns:
+        {name: read-only array}
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: '{info.filename}' is compressed and cannot be memory-mapped")
+
+            # Skip the local file header (its name and extra field lengths can differ from the central directory)
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-len('.npy')]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)  # Empty arrays cannot be mapped
+            else:
+                arrays[name] = np.asarray(np.memmap(f, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                                    order='F' if fortran_order else 'C'))
+    return arrays
@@ -1,17 +1,17 @@
 """Main entry point for CA-based evacuation simulation."""
 import os
 import sys
-import numpy as np
-import matplotlib.pyplot as plt
+import time
 from config import ca_settings
-from core.ca.ca_engine import CASimulation
 from core.ca.ca_grid import (
-    CELL_EMPTY, CELL_PERSON, CELL_WALL, CELL_EXIT,
+    CELL_PERSON, CELL_WALL, CELL_EXIT,
     CELL_ENTRANCE, CELL_EXHIBIT, CELL_EXHIBIT_SPECIAL, CELL_SECURITY
 )
-from io_manager.excel_parser import parse_excel_config, create_empty_config_template
-from io_manager.excel_writer import create_output_workbook
+from io_manager.excel_parser import create_empty_config_template
+from io_manager.layout_cache import load_layout
+from io_manager.excel_writer import StreamingExcelWriter
 from analysis.ca_logger import CALogger
+from analysis.ca_postprocess import OUTPUT_FILES, run_postprocessing
 
 
 def main():
@@ -27,7 +27,7 @@ def main():
     if not os.path.exists(ca_settings.CONFIG_FILE):
         print(f"\nConfig file not found: {ca_settings.CONFIG_FILE}")
         print("Creating empty template...")
-        create_empty_config_template(ca_settings.CONFIG_FILE)
+        create_empty_config_template(ca_settings.CONFIG_FILE, ca_settings.GRID_WIDTH, ca_settings.GRID_HEIGHT)
         print(f"Template created at {ca_settings.CONFIG_FILE}")
         print("Please edit the template to configure the simulation and run again.")
         return
@@ -35,59 +35,51 @@ def main():
     # Parse configuration
     print(f"\nLoading configuration from {ca_settings.CONFIG_FILE}...")
     try:
-        config = parse_excel_config(ca_settings.CONFIG_FILE)
+        layout, cached = load_layout(ca_settings.CONFIG_FILE, ca_settings.LAYOUT_CACHE_DIR)
     except Exception as e:
         print(f"Error loading config: {e}")
         return
+    print("Loaded compiled layout from cache" if cached else "Parsed workbook and cached the compiled layout")
 
-    width = config['width']
-    height = config['height']
-    params = config['params']
+    width = layout.width
+    height = layout.height
+    params = layout.params
 
     print(f"Grid size: {width} × {height}")
     print(f"Simulation steps: {params['simulation_steps']}")
     print(f"Initial population: {params['initial_population']}")
+    print(f"Random seed: {params['random_seed'] if params['random_seed'] is not None else 'fresh'}")
+    print(f"Exit capacity: {params['exit_capacity'] if params['exit_capacity'] is not None else 'unlimited'}")
 
-    # Initialize simulation
+    # Initialize simulation: layout and agents from config
     print("\nInitializing simulation...")
-    sim = CASimulation(width, height, max_timesteps=params['simulation_steps'])
-
-    # Load grid from config
-    for x in range(width):
-        for y in range(height):
-            if x < len(config['grid_data']) and y < len(config['grid_data'][x]):
-                cell_type = config['grid_data'][x][y]
-                if cell_type != CELL_EMPTY:
-                    sim.grid.set_cell_type(x, y, cell_type)
-
-    # Add agents from configuration
-    if config['agents']:
-        print(f"Loading {len(config['agents'])} agents from config...")
-        for agent_data in config['agents']:
-            sim.add_agent(
-                agent_data['id'],
-                agent_data['x'],
-                agent_data['y'],
-                agent_data.get('age'),
-                agent_data.get('family_id')
-            )
+    if layout.agents:
+        print(f"Loading {len(layout.agents)} agents from config...")
     else:
         # Random agent placement if no initial state specified
         print(f"Placing {params['initial_population']} agents randomly...")
-        placed = sim.add_agents_random(params['initial_population'])
-        print(f"Placed {placed} agents")
+    sim = layout.create_simulation(mode=ca_settings.ENGINE_MODE, backend=ca_settings.ENGINE_BACKEND)
+    print(f"Placed {len(sim.agents)} agents")
 
     # Initialize logger
-    logger = CALogger()
+    logger = CALogger(mode=ca_settings.LOG_MODE)
+    loggers = [logger]
+
+    # Streaming Excel export writes its rows while the simulation runs
+    excel_path = os.path.join(ca_settings.OUTPUT_DIR, OUTPUT_FILES['workbook'])
+    excel_writer = None
+    if ca_settings.EXCEL_EXPORT == 'streaming':
+        excel_writer = StreamingExcelWriter(excel_path, sim.grid.static_layer,
+                                            snapshot_interval=ca_settings.TIMESTEP_SNAPSHOT_SKIP,
+                                            mode=ca_settings.LOG_MODE)
+        loggers.append(excel_writer)
 
-    # Load environment (exits, entrances)
-    sim.environment.load_from_grid()
     print(f"Found {len(sim.environment.exits)} exits and {len(sim.environment.entrances)} entrances")
 
     # Run simulation
     print("\nRunning simulation...")
     print("-" * 60)
-    total_steps = sim.run(logger=logger)
+    total_steps = sim.run(logger=loggers)
 
     print("-" * 60)
     print(f"\nSimulation complete after {total_steps} timesteps")
@@ -103,28 +95,25 @@ def main():
     print(f"  Average final panic: {summary_stats['avg_panic_final']:.3f}")
     print(f"  Max final panic: {summary_stats['max_panic_final']:.3f}")
 
-    # Save results
+    # Save results: CSVs, workbook and heatmaps written concurrently
     print("\nSaving results...")
-
-    # Save agent trajectories to CSV
-    csv_path = os.path.join(ca_settings.OUTPUT_DIR, "ca_simulation_log.csv")
-    logger.save_to_csv(csv_path)
-    print(f"  Agent trajectories saved to {csv_path}")
-
-    # Save statistics to CSV
-    stats_csv_path = os.path.join(ca_settings.OUTPUT_DIR, "ca_statistics.csv")
-    logger.save_statistics_csv(stats_csv_path)
-    print(f"  Statistics saved to {stats_csv_path}")
-
-    # Save results to Excel
-    excel_path = os.path.join(ca_settings.OUTPUT_DIR, "ca_simulation_results.xlsx")
-    logger_data = logger.records
-    create_output_workbook(sim, logger_data, excel_path)
-    print(f"  Results saved to {excel_path}")
-
-    # Generate heatmaps
-    print("\nGenerating heatmaps...")
-    _generate_heatmaps(logger, width, height)
+    start = time.perf_counter()
+    outputs, errors = run_postprocessing(sim, logger, ca_settings.OUTPUT_DIR, excel_writer=excel_writer,
+                                         max_workers=ca_settings.POSTPROCESS_WORKERS)
+    labels = {
+        'trajectories': "Agent trajectories",
+        'statistics': "Statistics",
+        'exits': "Exit throughput",
+        'workbook': "Results",
+        'heatmap': "Heatmap",
+    }
+    for name, label in labels.items():
+        if name in outputs:
+            path, seconds = outputs[name]
+            print(f"  {label} saved to {path} ({seconds:.2f} s)")
+        else:
+            print(f"  Warning: Could not save {label.lower()}: {errors[name]}")
+    print(f"  All outputs written in {time.perf_counter() - start:.2f} s")
 
     print("\n" + "=" * 60)
     print("Simulation completed successfully!")
@@ -132,35 +121,5 @@ def main():
     print("=" * 60)
 
 
-def _generate_heatmaps(logger, width, height):
-    """Generate and save heatmap visualizations."""
-    try:
-        fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-
-        # Crowding heatmap
-        crowding = logger.get_crowding_heatmap(width, height)
-        im1 = axes[0].imshow(crowding.T, cmap='hot', origin='lower')
-        axes[0].set_title('Crowding Density Heatmap')
-        axes[0].set_xlabel('X')
-        axes[0].set_ylabel('Y')
-        plt.colorbar(im1, ax=axes[0], label='Visits per timestep')
-
-        # Panic heatmap
-        panic = logger.get_panic_heatmap(width, height)
-        im2 = axes[1].imshow(panic.T, cmap='RdYlGn_r', origin='lower', vmin=0, vmax=1)
-        axes[1].set_title('Panic Level Heatmap')
-        axes[1].set_xlabel('X')
-        axes[1].set_ylabel('Y')
-        plt.colorbar(im2, ax=axes[1], label='Average Panic Level')
-
-        heatmap_path = os.path.join(ca_settings.OUTPUT_DIR, "ca_heatmap.png")
-        plt.tight_layout()
-        plt.savefig(heatmap_path, dpi=100)
-        plt.close()
-        print(f"  Heatmap saved to {heatmap_path}")
-    except Exception as e:
-        print(f"  Warning: Could not generate heatmap: {e}")
-
-
 if __name__ == "__main__":
     main()
@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 """Setup script to create Excel configuration template."""
+import argparse
 import os
 import sys
 
-def setup():
-    """Create Excel template if it doesn't exist."""
+def setup(width=100, height=100):
+    """Create Excel template with a width×height grid if it doesn't exist."""
     config_dir = "config"
     config_file = os.path.join(config_dir, "museum_ca_config.xlsx")
 
@@ -16,8 +17,8 @@ def setup():
 
     try:
         from io_manager.excel_parser import create_empty_config_template
-        create_empty_config_template(config_file)
-        print(f"Created Excel template: {config_file}")
+        create_empty_config_template(config_file, width, height)
+        print(f"Created Excel template: {config_file} ({width} × {height} grid)")
         print("\nYou can now:")
         print(f"1. Edit {config_file} to configure your simulation:")
         print("   - Set walls (value: 2)")
@@ -30,4 +31,8 @@ def setup():
         sys.exit(1)
 
 if __name__ == "__main__":
-    setup()
+    parser = argparse.ArgumentParser(description="Create the Excel configuration template.")
+    parser.add_argument('--width', type=int, default=100, help="grid width in cells (default: %(default)s)")
+    parser.add_argument('--height', type=int, default=100, help="grid height in cells (default: %(default)s)")
+    args = parser.parse_args()
+    setup(args.width, args.height)
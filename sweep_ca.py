@@ -0,0 +1,96 @@
+"""Run a parameter sweep of CA evacuation simulations over one Excel layout."""
+import argparse
+import os
+from config import ca_settings
+from core.ca.ca_layout import CALayout
+from core.ca.ca_sweep import run_sweep
+from io_manager.excel_parser import parse_excel_config
+
+
+def parse_list(text, convert):
+    """Parse a comma separated list of values."""
+    return [convert(value) for value in text.split(',') if value.strip()]
+
+
+def parse_capacity(text):
+    """Parse an exit capacity ('none' means unlimited)."""
+    return None if text.strip().lower() == 'none' else int(text)
+
+
+def parse_exit_cells(text):
+    """Parse 'x,y;x,y' into a list of exit cells ('' or 'none' means all exits open)."""
+    if text.strip().lower() in ('', 'none'):
+        return []
+    return [tuple(int(v) for v in cell.split(',')) for cell in text.split(';') if cell.strip()]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Sweep CA simulation parameters over one layout in parallel.")
+    parser.add_argument('--spread', help="panic_spread_rate values, e.g. 0.05,0.1,0.2")
+    parser.add_argument('--decay', help="panic_decay_rate values, e.g. 0.005,0.01")
+    parser.add_argument('--population', help="initial_population values, e.g. 50,100,200")
+    parser.add_argument('--exit-capacity', help="exit_capacity values in agents per step per door, e.g. 1,2,none")
+    parser.add_argument('--closed-exits', action='append', metavar='X,Y;X,Y',
+                        help="exit cells closed in one exit configuration (repeatable, 'none' = all open)")
+    parser.add_argument('-n', '--replicas', type=int, default=1, help="runs per parameter point (default: %(default)s)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=None, help="base seed (default: random_seed from the config)")
+    parser.add_argument('--steps', type=int, default=None, help="override simulation_steps from the config")
+    parser.add_argument('--mode', default='vectorized', choices=['vectorized', 'reference'],
+                        help="engine mode (default: %(default)s)")
+    parser.add_argument('--config', default=ca_settings.CONFIG_FILE, help="Excel configuration file")
+    parser.add_argument('--output', default=ca_settings.OUTPUT_DIR, help="output directory")
+    return parser.parse_args()
+
+
+def main():
+    """Run the sweep and save the tidy results table."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("CA Evacuation Simulation - Parameter Sweep")
+    print("=" * 60)
+
+    print(f"\nLoading configuration from {args.config}...")
+    layout = CALayout(parse_excel_config(args.config))
+    print(f"Grid size: {layout.width} × {layout.height}, {len(layout.exits)} exit cells")
+
+    param_grid = {}
+    if args.spread:
+        param_grid['panic_spread_rate'] = parse_list(args.spread, float)
+    if args.decay:
+        param_grid['panic_decay_rate'] = parse_list(args.decay, float)
+    if args.population:
+        param_grid['initial_population'] = parse_list(args.population, int)
+    if args.exit_capacity:
+        param_grid['exit_capacity'] = parse_list(args.exit_capacity, parse_capacity)
+    if args.closed_exits:
+        param_grid['closed_exits'] = [parse_exit_cells(text) for text in args.closed_exits]
+
+    points = 1
+    for values in param_grid.values():
+        points *= len(values)
+    print(f"\nRunning {points} parameter points × {args.replicas} replicas ({args.mode} mode)...")
+
+    os.makedirs(args.output, exist_ok=True)
+    results_path = os.path.join(args.output, "ca_sweep_results.csv")
+    results = run_sweep(layout, param_grid, replicas=args.replicas, seed=args.seed, mode=args.mode,
+                        max_timesteps=args.steps, max_workers=args.workers, output_path=results_path)
+    print(f"  Results saved to {results_path}")
+
+    # Mean per parameter point
+    swept = list(param_grid)
+    metrics = ['evacuation_rate', 'time_to_50pct', 'time_to_90pct', 'avg_panic_final']
+    if swept:
+        summary = results
+        if 'exit_capacity' in swept:
+            # Integer capacities, 'none' for unlimited (None would read as NaN)
+            capacity = results['exit_capacity'].astype('Int64').astype(object)
+            summary = results.assign(exit_capacity=capacity.where(capacity.notna(), 'none'))
+        print("\nMean per parameter point:")
+        print(summary.groupby(swept, sort=False, dropna=False)[metrics].mean().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 import os
 import numpy as np
 from core.ca.ca_engine import CASimulation
+from core.ca.ca_checkpoint import fork_simulation
 from core.ca.ca_grid import CELL_WALL, CELL_EXIT, CELL_ENTRANCE
 from analysis.ca_logger import CALogger
 
@@ -74,7 +75,7 @@ def run_demo():
 
         # Print progress every 50 steps
         if sim.timestep % 50 == 0:
-            active = len([a for a in sim.agents if not a.evacuated])
+            active = sim.agents.active_count
             evacuated = len(sim.evacuated_agents)
             print(f"Step {sim.timestep:4d}: Active={active:3d}, Evacuated={evacuated:3d}")
 
@@ -118,9 +119,31 @@ def run_demo():
     return sim, logger
 
 
+def test_exit_throughput_after_block_exit():
+    """Door throughputs still add up to the evacuations after exits are closed mid-run."""
+    for exit_capacity in (None, 1):
+        sim = CASimulation(width=100, height=100, max_timesteps=300, mode='vectorized', seed=7,
+                           exit_capacity=exit_capacity)
+        create_simple_layout(sim)
+        sim.add_agents_random(150)
+        for _ in range(60):
+            sim.step()
+
+        kept = sim.environment.exits[0]
+        fork = fork_simulation(sim, {'blocked': lambda s: [s.environment.block_exit(x, y)
+                                                           for x, y in s.environment.exits if (x, y) != kept]})['blocked']
+        for _ in range(100):
+            fork.step()
+
+        exit_stats = fork.get_exit_statistics()
+        assert [entry['door'] for entry in exit_stats][-1] == 'closed'
+        assert sum(entry['throughput'] for entry in exit_stats) == len(fork.evacuated_agents)
+
+
 if __name__ == "__main__":
     try:
         sim, logger = run_demo()
+        test_exit_throughput_after_block_exit()
         print("\nYou can now:")
         print("1. Edit config/museum_ca_config.xlsx to create your own scenario")
         print("2. Run: python main_ca.py")